@@ -1,76 +1,374 @@
 import os
-import openai
+import json
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
-from fpdf import FPDF
-from tqdm import tqdm
+import tiktoken
+from tqdm.asyncio import tqdm
 from dotenv import load_dotenv
 
+from openai_client import create_async_client, retry_api_call
+from pdf_writer import save_as_pdf
+from summary_cache import SummaryCache, cache_key, file_sha256, text_sha256
+
 # Load API key from environment variable
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # Configuration
 INPUT_FOLDER = "books/"
 OUTPUT_FOLDER = "gemini_pdf_summaries/"
 MODEL = "gpt-4"  # or "gpt-3.5-turbo"
+MAX_INPUT_TOKENS = 5000  # Book text sent per request; leaves room in gpt-4's 8k window for the summary
+# Longer books are summarised chunk by chunk and the partial summaries merged (map-reduce). When the
+# partials do not fit one reduce request they are merged in groups first, as many levels as needed.
+CHUNK_OVERLAP_TOKENS = 200  # Shared between neighbouring chunks so ideas split at a boundary survive
+PARTIAL_SUMMARY_TOKENS = 600  # Headroom over the prompt's 350 words, since a cut-off partial is an error
+MAX_CONCURRENCY = 8  # Books summarised at once
+# Chat requests in flight across all books, each up to MAX_INPUT_TOKENS; size this to your TPM quota
+MAX_REQUESTS_IN_FLIGHT = int(os.getenv("OPENAI_REQUESTS_IN_FLIGHT", "4"))
+EXTRACTION_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Processes parsing PDFs, leaving a core for the event loop
+BATCH_POLL_MAX_DELAY = 300  # Seconds between batch status checks once fully backed off
+CACHE_FOLDER = os.path.join(OUTPUT_FOLDER, ".cache")
+PROMPT_VERSION = "v3"  # Bump when the prompt changes so cached summaries are regenerated
+CACHE_SCOPE = f"{MODEL}:{PROMPT_VERSION}"
+BATCH_CACHE_PART = "batch-first-chunk"  # Keeps first-chunk batch summaries apart from whole-book ones
+# Optionally reuse the summary of a near-identical book (e.g. another edition) via embeddings
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+_encoding = None
+_request_slots = asyncio.Semaphore(MAX_REQUESTS_IN_FLIGHT)
+
+
+def get_encoding():
+    # Loaded once per extraction process; building the BPE tables is not free
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.encoding_for_model(MODEL)
+    return _encoding
+
+
+def split_into_chunks(text):
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    step = MAX_INPUT_TOKENS - CHUNK_OVERLAP_TOKENS
+    starts = range(0, max(len(tokens) - CHUNK_OVERLAP_TOKENS, 1), step)
+    return [encoding.decode(tokens[start:start + MAX_INPUT_TOKENS]) for start in starts]
 
 
 def extract_text_from_pdf(pdf_path):
+    parts = []
     doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text[:12000]  # Limit text length for token budget
-
-
-def summarize_with_chatgpt(book_text, book_title):
-    system_prompt = (
-        "You are a professional book summarizer and blog writer. "
-        "Summarize the following book into about 4 A4 pages. "
-        "Make it useful as both a summary and an engaging blog-style review. "
-        "Include key insights, structure, and tone."
-    )
-    messages = [
+    try:
+        for pno in range(doc.page_count):
+            # flags=0 skips ligature/whitespace preservation and image blocks we never use
+            parts.append(doc.load_page(pno).get_text("text", flags=0, sort=False))
+    finally:
+        doc.close()
+    return split_into_chunks("".join(parts))
+
+
+async def extract_chunks_in_pool(extraction_pool, pdf_path):
+    # PDF parsing is CPU work, so it runs in the worker processes rather than on the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(extraction_pool, extract_text_from_pdf, pdf_path)
+
+
+SUMMARY_PROMPT = (
+    "You are a professional book summarizer and blog writer. "
+    "Summarize the following book into about 4 A4 pages. "
+    "Make it useful as both a summary and an engaging blog-style review. "
+    "Include key insights, structure, and tone."
+)
+PARTIAL_PROMPT = (
+    "You are summarizing one section of a longer book. "
+    "Summarize this section in at most 350 words, keeping its key ideas, arguments, and examples."
+)
+
+
+def build_messages(book_text, book_title, system_prompt=SUMMARY_PROMPT, label="Book content"):
+    return [
         {"role": "system", "content": system_prompt},
         {
             "role": "user",
-            "content": f"Title: {book_title}\n\nBook content:\n{book_text}",
+            "content": f"Title: {book_title}\n\n{label}:\n{book_text}",
         },
     ]
 
-    response = openai.ChatCompletion.create(model=MODEL, messages=messages, temperature=0.7)
-    return response["choices"][0]["message"]["content"]
 
+@retry_api_call
+async def complete(client, messages, max_tokens=None):
+    # The slot is taken per attempt, so a request backing off before a retry does not hold one
+    async with _request_slots:
+        response = await client.chat.completions.create(
+            model=MODEL, messages=messages, temperature=0.7, max_tokens=max_tokens
+        )
+    choice = response.choices[0]
+    # A reply cut off by max_tokens or the context window must not be cached as if it were complete
+    if choice.finish_reason == "length":
+        raise RuntimeError("Summary was cut off before it finished (finish_reason 'length').")
+    return choice.message.content
 
-def save_as_pdf(text, output_path):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    text = "".join([c if ord(c) < 128 else "" for c in text])  # Strip emojis
 
-    for line in text.split("\n"):
-        pdf.multi_cell(0, 10, line)
-    pdf.output(output_path)
+async def summarize_chunk(client, cache, chunk, book_title, label="Book section"):
+    # Partials are cached by their own text, so a rerun after a failed reduce does not redo the map step
+    key = cache_key(text_sha256(chunk), MODEL, PROMPT_VERSION, "partial")
+    partial = cache.get(key)
+    if partial is None:
+        messages = build_messages(chunk, book_title, PARTIAL_PROMPT, label)
+        partial = await complete(client, messages, max_tokens=PARTIAL_SUMMARY_TOKENS)
+        cache.put(key, partial)
+    return partial
 
 
-def summarise_ebooks():
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+def group_partials(partials):
+    """Pack consecutive partial summaries into groups that each fit in one request."""
+    encoding = get_encoding()
+    groups, group, group_tokens = [], [], 0
+    for partial in partials:
+        tokens = len(encoding.encode(partial, disallowed_special=()))
+        if group and group_tokens + tokens > MAX_INPUT_TOKENS:
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(partial)
+        group_tokens += tokens
+    groups.append(group)
+    return groups
+
+
+async def summarize_with_chatgpt(client, cache, chunks, book_title):
+    if len(chunks) == 1:
+        return await complete(client, build_messages(chunks[0], book_title))
+
+    partials = await asyncio.gather(*(summarize_chunk(client, cache, chunk, book_title) for chunk in chunks))
+    # Merge the partials level by level until they fit the final reduce request
+    while len(groups := group_partials(partials)) > 1:
+        partials = await asyncio.gather(
+            *(summarize_chunk(client, cache, "\n\n".join(group), book_title, "Section summaries") for group in groups)
+        )
+    return await complete(client, build_messages("\n\n".join(partials), book_title, label="Section summaries"))
+
+
+async def summary_cache_key(book_path):
+    pdf_digest = await asyncio.to_thread(file_sha256, book_path)
+    return cache_key(pdf_digest, MODEL, PROMPT_VERSION)
+
+
+@retry_api_call
+async def embed_book_text(client, book_text):
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=book_text[:2048])
+    return response.data[0].embedding
+
+
+async def summarize_with_cache(client, cache, key, chunks, book_title):
+    embedding = None
+    if SEMANTIC_CACHE:
+        embedding = await embed_book_text(client, chunks[0])
+        summary = cache.find_similar(embedding, SEMANTIC_CACHE_THRESHOLD, scope=CACHE_SCOPE)
+        if summary is not None:
+            print(f"♻️ Using cached summary of a near-identical book for: {book_title}")
+            cache.put(key, summary)
+            return summary
+
+    summary = await summarize_with_chatgpt(client, cache, chunks, book_title)
+    cache.put(key, summary, embedding, scope=CACHE_SCOPE)
+    return summary
+
+
+async def submit_batch(client, extraction_pool, book_paths):
+    """Upload one JSONL request per book and start a Batch API job for them."""
+    # Parse every book across the extraction processes at once
+    book_chunks = await asyncio.gather(*(extract_chunks_in_pool(extraction_pool, path) for path in book_paths))
+
+    requests = []
+    for book_path, chunks in zip(book_paths, book_chunks):
+        book_title = os.path.splitext(os.path.basename(book_path))[0]
+        # One request per book, so batch jobs summarise only the first chunk
+        if len(chunks) > 1:
+            print(f"⚠️ Batch mode summarises only the first of {len(chunks)} chunks of: {book_title}")
+        body = {"model": MODEL, "messages": build_messages(chunks[0], book_title), "temperature": 0.7}
+        requests.append({"custom_id": book_title, "method": "POST", "url": "/v1/chat/completions", "body": body})
+
+    jsonl = "\n".join(json.dumps(request) for request in requests).encode("utf-8")
+    batch_id = await start_batch(client, jsonl)
+    print(f"📦 Submitted batch {batch_id} with {len(requests)} book(s)")
+    return batch_id
 
-    for filename in tqdm(os.listdir(INPUT_FOLDER)):
-        if filename.lower().endswith(".pdf"):
-            book_path = os.path.join(INPUT_FOLDER, filename)
-            book_title = os.path.splitext(filename)[0]
-            print(f"\n🔍 Processing: {book_title}")
 
+@retry_api_call
+async def start_batch(client, jsonl):
+    batch_file = await client.files.create(file=("book_summaries.jsonl", jsonl), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+    )
+    return batch.id
+
+
+@retry_api_call
+async def wait_for_batch(client, batch_id):
+    delay = 5
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in ["completed", "failed", "expired", "cancelled"]:
+            return batch
+        print(f"⏳ Batch {batch_id} is {batch.status}, checking again in {delay}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+
+
+async def summarise_ebooks_in_batch(client, cache, extraction_pool, book_paths):
+    keys = {}
+    uncached_paths = []
+    for book_path in book_paths:
+        book_title = os.path.splitext(os.path.basename(book_path))[0]
+        # A whole-book summary from an interactive run is reused here, but batch output covers only the
+        # first chunk, so it is cached under its own key that interactive runs never read
+        pdf_digest = await asyncio.to_thread(file_sha256, book_path)
+        key = cache_key(pdf_digest, MODEL, PROMPT_VERSION, BATCH_CACHE_PART)
+        summary = cache.get(cache_key(pdf_digest, MODEL, PROMPT_VERSION))
+        if summary is None:
+            summary = cache.get(key)
+        if summary is None:
+            keys[book_title] = key
+            uncached_paths.append(book_path)
+        else:
+            print(f"♻️ Using cached summary for: {book_title}")
+            save_as_pdf(summary, os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf"))
+
+    if not uncached_paths:
+        return
+
+    batch_id = await submit_batch(client, extraction_pool, uncached_paths)
+    batch = await wait_for_batch(client, batch_id)
+    if batch.status != "completed":
+        print(f"❌ Batch {batch_id} finished with status '{batch.status}'")
+
+    # Successful requests land in the output file and failed ones in the error file; either may be absent
+    results = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            content = await retry_api_call(client.files.content)(file_id)
+            results.extend(json.loads(line) for line in content.text.splitlines())
+
+    missing = set(keys)
+    for result in results:
+        book_title = result["custom_id"]
+        missing.discard(book_title)
+        try:
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                raise RuntimeError(result.get("error") or response.get("body", {}).get("error"))
+            choice = response["body"]["choices"][0]
+            if choice["finish_reason"] == "length":
+                raise RuntimeError("Summary was cut off before it finished (finish_reason 'length').")
+            summary = choice["message"]["content"]
+            cache.put(keys[book_title], summary)
+            output_pdf = os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf")
+            save_as_pdf(summary, output_pdf)
+            print(f"✅ Saved summary to {output_pdf}")
+        except Exception as e:
+            print(f"❌ Failed to process {book_title}: {e}")
+
+    # Whatever is left got no result at all, e.g. when the batch expired or was cancelled
+    for book_title in sorted(missing):
+        print(f"❌ No result for {book_title} in batch {batch_id}")
+
+
+# Pipeline stages: extractor -> text_q -> summarizer -> render_q -> renderer. The bounded queues let
+# book N+1 be parsed while book N is with the API and book N-1 is written out, without reading ahead
+# of the API. A None on a queue tells the consuming worker to stop.
+async def extractor(path_q, text_q, render_q, cache, extraction_pool):
+    while (book_path := await path_q.get()) is not None:
+        book_title = os.path.splitext(os.path.basename(book_path))[0]
+        print(f"\n🔍 Processing: {book_title}")
+        try:
+            key = await summary_cache_key(book_path)
+            summary = cache.get(key)
+            if summary is not None:
+                print(f"♻️ Using cached summary for: {book_title}")
+                await render_q.put((book_title, summary))
+                continue
+            chunks = await extract_chunks_in_pool(extraction_pool, book_path)
+            await text_q.put((book_title, key, chunks))
+        except Exception as e:
+            print(f"❌ Failed to process {book_title}: {e}")
+            await render_q.put((book_title, None))
+
+
+async def summarizer(text_q, render_q, client, cache):
+    while (item := await text_q.get()) is not None:
+        book_title, key, chunks = item
+        try:
+            summary = await summarize_with_cache(client, cache, key, chunks, book_title)
+        except Exception as e:
+            print(f"❌ Failed to process {book_title}: {e}")
+            summary = None
+        await render_q.put((book_title, summary))
+
+
+async def renderer(render_q, progress):
+    while (item := await render_q.get()) is not None:
+        book_title, summary = item
+        if summary is not None:
+            output_pdf = os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf")
             try:
-                book_text = extract_text_from_pdf(book_path)
-                summary = summarize_with_chatgpt(book_text, book_title)
-                output_pdf = os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf")
-                save_as_pdf(summary, output_pdf)
+                await asyncio.to_thread(save_as_pdf, summary, output_pdf)
                 print(f"✅ Saved summary to {output_pdf}")
             except Exception as e:
                 print(f"❌ Failed to process {book_title}: {e}")
+        progress.update()
+
+
+async def run_pipeline(client, cache, extraction_pool, book_paths):
+    path_q = asyncio.Queue()
+    text_q = asyncio.Queue(maxsize=MAX_CONCURRENCY)
+    render_q = asyncio.Queue(maxsize=MAX_CONCURRENCY)
+    for book_path in book_paths:
+        path_q.put_nowait(book_path)
+    for _ in range(EXTRACTION_WORKERS):
+        path_q.put_nowait(None)
+
+    async def extract_stage():
+        await asyncio.gather(
+            *(extractor(path_q, text_q, render_q, cache, extraction_pool) for _ in range(EXTRACTION_WORKERS))
+        )
+        for _ in range(MAX_CONCURRENCY):
+            await text_q.put(None)
+
+    async def summarize_stage():
+        await asyncio.gather(*(summarizer(text_q, render_q, client, cache) for _ in range(MAX_CONCURRENCY)))
+        await render_q.put(None)
+
+    with tqdm(total=len(book_paths)) as progress:
+        await asyncio.gather(extract_stage(), summarize_stage(), renderer(render_q, progress))
+
+
+async def summarise_ebooks(use_batch=False):
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    # DirEntry caches the file type from the directory scan, saving a stat call per file
+    with os.scandir(INPUT_FOLDER) as it:
+        book_paths = [entry.path for entry in it if entry.is_file() and entry.name.lower().endswith(".pdf")]
+
+    cache = SummaryCache(CACHE_FOLDER)
+    with ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS) as extraction_pool:
+        async with create_async_client() as client:
+            if use_batch:
+                await summarise_ebooks_in_batch(client, cache, extraction_pool, book_paths)
+                return
+
+            await run_pipeline(client, cache, extraction_pool, book_paths)
 
 
 if __name__ == "__main__":
-    summarise_ebooks()
+    parser = argparse.ArgumentParser(description="Summarise every PDF in the books folder with ChatGPT")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all books as one OpenAI Batch API job (half price, results within 24h)",
+    )
+    args = parser.parse_args()
+    asyncio.run(summarise_ebooks(use_batch=args.batch))
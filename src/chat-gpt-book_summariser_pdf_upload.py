@@ -1,30 +1,40 @@
 import os
-import time
+import json
+import asyncio
 import openai
-from fpdf import FPDF
-from tqdm import tqdm
+from tqdm.asyncio import tqdm
 from dotenv import load_dotenv
 
+from openai_client import create_async_client, retry_api_call, retry_create_call
+from pdf_writer import save_as_pdf
+from summary_cache import file_sha256, write_atomically
+
 # Load API key
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # Configuration
 INPUT_FOLDER = "../books/"
 OUTPUT_FOLDER = "gemini_pdf_summaries/"
 ASSISTANT_NAME = "Book Summarizer Assistant"
 MODEL = "gpt-4o"
+MAX_CONCURRENCY = 8  # Books summarised at once; size this to your RPM/TPM quota
+POLL_INITIAL_DELAY = 0.5  # Seconds before the first run-status check, doubled on each retry
+POLL_MAX_DELAY = 8.0
+FILE_INDEX_PATH = ".openai_files.json"  # Maps PDF sha256 -> uploaded OpenAI file id, least recently used first
+MAX_INDEXED_FILES = 100  # Uploaded books kept for reuse; the least recently used are deleted beyond this
+RUN_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled", "incomplete")
 
 
 # Create Assistant (only once)
-def create_or_get_assistant():
-    assistants = openai.beta.assistants.list(limit=20)
+@retry_api_call
+async def create_or_get_assistant(client):
+    assistants = await client.beta.assistants.list(limit=20)
     for assistant in assistants.data:
         if assistant.name == ASSISTANT_NAME:
             return assistant.id
 
     print("Creating new assistant...")
-    assistant = openai.beta.assistants.create(
+    assistant = await client.beta.assistants.create(
         name=ASSISTANT_NAME,
         instructions=(
             "You are a helpful book summarizer. Your job is to read uploaded PDFs of books "
@@ -37,72 +47,131 @@ def create_or_get_assistant():
     return assistant.id
 
 
-def upload_pdf_to_openai(filepath):
+def load_file_index():
+    try:
+        with open(FILE_INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+@retry_create_call
+async def create_file(client, filepath):
+    # Opened per attempt, so a retry uploads the whole book again rather than from the end of the stream
     with open(filepath, "rb") as f:
-        file = openai.files.create(file=f, purpose="assistants")
+        return await client.files.create(file=f, purpose="assistants")
+
+
+async def upload_pdf_to_openai(client, file_index, filepath):
+    # Reuse the server-side copy of a book uploaded by an earlier run
+    digest = await asyncio.to_thread(file_sha256, filepath)
+    file_id = file_index.pop(digest, None)
+    if file_id:
+        try:
+            await retry_api_call(client.files.retrieve)(file_id)
+            print(f"♻️ Reusing uploaded file {file_id} for: {os.path.basename(filepath)}")
+            file_index[digest] = file_id  # Re-inserted to mark it most recently used
+            write_atomically(FILE_INDEX_PATH, json.dumps(file_index, indent=2))
+            return file_id
+        except openai.NotFoundError:
+            pass  # Deleted on the server since it was cached
+
+    file = await create_file(client, filepath)
+    file_index[digest] = file.id
+
+    # Evict the least recently used uploads so neither the index nor the server-side storage keeps growing
+    evicted = []
+    while len(file_index) > MAX_INDEXED_FILES:
+        evicted.append(file_index.pop(next(iter(file_index))))
+    write_atomically(FILE_INDEX_PATH, json.dumps(file_index, indent=2))
+    for evicted_id in evicted:
+        try:
+            await retry_api_call(client.files.delete)(evicted_id)
+        except openai.NotFoundError:
+            pass
+        except openai.APIError as e:
+            print(f"⚠️ Could not delete evicted file {evicted_id}: {e}")
     return file.id
 
 
-def summarize_book(assistant_id, file_id, book_title):
+async def start_run(client, thread_id, assistant_id):
+    create_run = retry_create_call(client.beta.threads.runs.create)
+    try:
+        return await create_run(thread_id=thread_id, assistant_id=assistant_id)
+    except openai.APIConnectionError:
+        # The run may already exist if the connection dropped after the server created it. The thread is
+        # new and only ever gets this one run, so look for it before starting another billed run.
+        runs = await retry_api_call(client.beta.threads.runs.list)(thread_id=thread_id, limit=1)
+        if runs.data:
+            return runs.data[0]
+        return await create_run(thread_id=thread_id, assistant_id=assistant_id)
+
+
+async def summarize_book(client, assistant_id, file_id, book_title):
+    # Each call is retried on its own: retrying the whole function would start a new billed run per attempt
     print(f"📩 Creating thread for: {book_title}")
-    thread = openai.beta.threads.create()
+    thread = await retry_api_call(client.beta.threads.create)()
 
-    # Send a message with no file
-    openai.beta.threads.messages.create(
+    # Attach the uploaded book to the message so file_search can read it
+    await retry_api_call(client.beta.threads.messages.create)(
         thread_id=thread.id,
         role="user",
         content=f"Please summarize the uploaded book '{book_title}' into a ~4 A4 page summary and blog-style review.",
+        attachments=[{"file_id": file_id, "tools": [{"type": "file_search"}]}],
     )
 
-    # Create a run with the file attached here
-    run = openai.beta.threads.runs.create(thread_id=thread.id, assistant_id=assistant_id, file_ids=[file_id])
+    run = await start_run(client, thread.id, assistant_id)
 
-    # Poll until the run is complete
+    # Poll until the run is complete, backing off exponentially between checks
+    delay = POLL_INITIAL_DELAY
     while True:
-        run_status = openai.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
-        if run_status.status in ["completed", "failed"]:
+        run_status = await retry_api_call(client.beta.threads.runs.retrieve)(thread_id=thread.id, run_id=run.id)
+        if run_status.status in RUN_TERMINAL_STATUSES:
             break
-        time.sleep(3)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_DELAY)
 
     if run_status.status == "completed":
-        messages = openai.beta.threads.messages.list(thread_id=thread.id)
+        messages = await retry_api_call(client.beta.threads.messages.list)(thread_id=thread.id)
         for msg in reversed(messages.data):
             if msg.role == "assistant":
                 return msg.content[0].text.value
     else:
-        raise RuntimeError("Assistant failed to complete the run.")
+        raise RuntimeError(f"Assistant run ended with status '{run_status.status}'.")
+
 
+async def process_ebook(client, semaphore, assistant_id, file_index, book_path):
+    book_title = os.path.splitext(os.path.basename(book_path))[0]
 
-def save_as_pdf(text, output_path):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    text = "".join([c if ord(c) < 128 else "" for c in text])  # Remove emojis
+    async with semaphore:
+        print(f"\n📘 Processing: {book_title}")
 
-    for line in text.split("\n"):
-        pdf.multi_cell(0, 10, line)
-    pdf.output(output_path)
+        try:
+            file_id = await upload_pdf_to_openai(client, file_index, book_path)
+            summary = await summarize_book(client, assistant_id, file_id, book_title)
+            output_path = os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf")
+            # Rendering is CPU-bound, so it runs off the event loop while other books are polled
+            await asyncio.to_thread(save_as_pdf, summary, output_path)
+            print(f"✅ Summary saved to: {output_path}")
+        except Exception as e:
+            print(f"❌ Failed to summarize {book_title}: {e}")
 
 
-def main():
+async def main():
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    assistant_id = create_or_get_assistant()
 
-    for filename in tqdm(os.listdir(INPUT_FOLDER)):
-        if filename.lower().endswith(".pdf"):
-            book_path = os.path.join(INPUT_FOLDER, filename)
-            book_title = os.path.splitext(filename)[0]
-            print(f"\n📘 Processing: {book_title}")
+    # DirEntry caches the file type from the directory scan, saving a stat call per file
+    with os.scandir(INPUT_FOLDER) as it:
+        book_paths = [entry.path for entry in it if entry.is_file() and entry.name.lower().endswith(".pdf")]
 
-            try:
-                file_id = upload_pdf_to_openai(book_path)
-                summary = summarize_book(assistant_id, file_id, book_title)
-                output_path = os.path.join(OUTPUT_FOLDER, f"{book_title}_summary.pdf")
-                save_as_pdf(summary, output_path)
-                print(f"✅ Summary saved to: {output_path}")
-            except Exception as e:
-                print(f"❌ Failed to summarize {book_title}: {e}")
+    file_index = load_file_index()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with create_async_client() as client:
+        assistant_id = await create_or_get_assistant(client)
+        await tqdm.gather(
+            *(process_ebook(client, semaphore, assistant_id, file_index, book_path) for book_path in book_paths)
+        )
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,8 +1,16 @@
 import os
+import re
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
+from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted, ServiceUnavailable
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import (
-    SimpleDocTemplate,
+    BaseDocTemplate,
+    Frame,
+    NextPageTemplate,
+    PageTemplate,
     Paragraph,
     Spacer,
     PageBreak,
@@ -10,13 +18,19 @@ from reportlab.platypus import (
     TableStyle,
 )
 from reportlab.lib.units import inch
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib import colors
 from reportlab.graphics.shapes import Drawing, Line
-from reportlab.graphics.charts.piecharts import Pie
 from reportlab.platypus.flowables import Flowable
 from dotenv import load_dotenv
-import time  # Import time for sleep
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+import time
 import sys
 import shutil  # Import shutil for moving files
+import traceback
+from xml.sax.saxutils import escape
+
+from summary_cache import SummaryCache, cache_key, file_sha256, text_sha256
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,202 +45,500 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 # Use a model that supports multimodal input (like Gemini 1.5 Pro)
 # 'gemini-1.5-pro-latest' is the correct and most capable model for this task.
 MODEL_NAME = "gemini-1.5-flash-latest"
+# A four-page review is typically 3-5k tokens; the cap stops a runaway response from streaming on
+MAX_OUTPUT_TOKENS = 6144
+TEMPERATURE = 0.4
+# Books uploaded and summarised at once; tune to your Gemini quota
+MAX_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+UPLOAD_WORKERS = 2  # Books uploaded ahead of generation; kept low so few files wait in Gemini storage
+POLL_INITIAL_DELAY = 0.5  # Seconds before the first file-state check, doubled on each retry
+POLL_MAX_DELAY = 10.0
+CACHE_FOLDER = os.path.join(OUTPUT_FOLDER, ".cache")  # Summaries keyed by PDF content, model and prompt
+# Set FORCE_REBUILD=1 to rebuild summary PDFs that are already newer than their book
+FORCE_REBUILD = os.getenv("FORCE_REBUILD", "0") == "1"
+# Set FANCY_PDF=1 to add the decorative pie chart to the cover; by default it is left out
+FANCY_PDF = os.getenv("FANCY_PDF", "0") == "1"
+
+_cleanup_tasks = set()  # Background deletions of uploaded Gemini files still in flight
+_uploaded_file_names = set()  # Files this run uploaded and has not yet deleted
+
+# Retry quota (429), overload and timeout errors with jittered backoff; bad requests such as
+# InvalidArgument still fail straight away
+retry_gemini_call = retry(
+    retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable, DeadlineExceeded)),
+    wait=wait_exponential_jitter(initial=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+
+
+# The instructions shared by every book, set once on the model as its system instruction.
+# It is too short for Gemini context caching (CachedContent needs tens of thousands of tokens).
+SYSTEM_INSTRUCTION = """
+You are a highly respected technology thought leader, writing a professional yet entertaining review and summary for your blog/LinkedIn.
+You will be given a book as a PDF together with its title.
+
+Your output should be structured as a professionally formatted blog post with clear headings, comprising:
+
+# BOOK SUMMARY: <book title>
+
+## Introduction
+* Begin with a brief overview of the book, its author, and why it matters in today's tech landscape.
+* Include the book's core premise and promise to readers in 2-3 sentences.
+* Mention why you decided to review this particular book.
+
+## Key Concepts and Insights
+* Break down 3-5 major concepts from the book using clear ### subheadings for each concept.
+* Thoroughly explain these ideas with examples from the book.
+* Use bullet points for listing important elements.
+* Include relevant quotes from the book using > quote format.
+
+## Practical Applications
+* Discuss how tech leaders can apply these concepts in their work.
+* Provide specific scenarios or examples of practical implementation.
+* Include actionable steps or frameworks the book provides.
+
+## Critical Analysis
+* What does the book do exceptionally well?
+* Where could it have been improved or gone deeper?
+* How does it compare to other works in this domain?
+
+# FINAL REVIEW AND RECOMMENDATION
+* Provide your overall assessment of the book's value to tech leaders.
+* Evaluate based on: originality, actionable insights, relevance to current tech trends, and writing quality.
+* Clearly define the ideal reader profile for this book.
+* End with a definitive verdict (e.g., "Highly recommended," "Worth a read," "For specific audiences only").
+
+Format your response using Markdown:
+- Use # for main sections, ## for subsections, and ### for topics
+- Use * or - for bullet points
+- Use > for notable quotes
+- Use **bold** for emphasis on important points
+- Break text into concise, readable paragraphs
+
+Make it engaging, insightful, and valuable for busy tech executives who want to know if this book is worth their time.
+"""
+# The only per-book part of the prompt, sent alongside the uploaded PDF
+BOOK_PROMPT_TEMPLATE = 'The book provided is titled: "{book_title}".'
+
+
+# Captures the block-level Markdown marker of a line (if any) and the text after it
+_MARKDOWN_LINE_RE = re.compile(r"^(?:(#{1,4}|>|[*-]) )?(.*)$")
+# Keywords that mark the review section and the recommendation lines highlighted within it
+_REVIEW_HEADING_RE = re.compile(r"review|recommendation", re.IGNORECASE)
+_RECOMMENDATION_RE = re.compile(r"recommend|conclusion|verdict", re.IGNORECASE)
+# Inline Markdown emphasis. Bold runs first so the italic pattern only sees single asterisks;
+# underscores must sit on word boundaries so snake_case names are left alone.
+_BOLD_RE = re.compile(r"\*\*(?=[^*])(.+?)(?<=[^*])\*\*|__(.+?)__")
+_ITAL_RE = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)")
+
+
+def _inline_markup(text: str) -> str:
+    """Escape text for a ReportLab Paragraph and turn Markdown bold/italic into balanced tags."""
+    return _ITAL_RE.sub(r"<i>\1\2</i>", _BOLD_RE.sub(r"<b>\1\2</b>", escape(text)))
+
+
+# Define custom colors for a professional look
+DARK_GREY = colors.HexColor("#2C3E50")
+LIGHT_GREY = colors.HexColor("#7F8C8D")
+ACCENT_BLUE = colors.HexColor("#3498DB")
+QUOTE_BG_COLOR = colors.HexColor("#ECF0F1")  # A light background for quotes
+
+# Shared by every book's table of contents
+_TOC_TABLE_STYLE = TableStyle(
+    [
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.white),  # No visible grid
+        ("LINEBELOW", (0, 0), (-1, -2), 0.5, LIGHT_GREY),  # Light separator lines
+        ("BACKGROUND", (0, 0), (-1, -1), colors.white),  # White background
+    ]
+)
+
+
+def create_summary_styles() -> dict:
+    """Create the paragraph styles for the summary PDF."""
+    # --- Custom Styles ---
+    styles = {
+        "h1": ParagraphStyle(
+            name="h1",
+            fontName="Helvetica-Bold",
+            fontSize=24,
+            textColor=DARK_GREY,
+            spaceAfter=18,
+            leading=30,
+        ),
+        "h2": ParagraphStyle(
+            name="h2",
+            fontName="Helvetica",
+            fontSize=16,
+            textColor=LIGHT_GREY,
+            spaceAfter=12,
+            leading=20,
+        ),
+        "h3": ParagraphStyle(
+            name="h3",
+            fontName="Helvetica-Bold",
+            fontSize=14,
+            textColor=ACCENT_BLUE,
+            spaceBefore=12,
+            spaceAfter=6,
+            leading=18,
+        ),
+        "h4": ParagraphStyle(
+            name="h4",
+            fontName="Helvetica-Bold",
+            fontSize=12,
+            textColor=DARK_GREY,
+            spaceBefore=10,
+            spaceAfter=4,
+            leading=16,
+        ),
+        "Normal": ParagraphStyle(
+            name="Normal",
+            fontName="Helvetica",
+            fontSize=11,
+            textColor=DARK_GREY,
+            spaceAfter=6,
+            leading=16,
+            alignment=4,
+        ),  # Justified
+        "Bullet": ParagraphStyle(
+            name="Bullet",
+            fontName="Helvetica",
+            fontSize=11,
+            textColor=DARK_GREY,
+            spaceAfter=4,
+            leading=16,
+            leftIndent=18,
+            bulletIndent=0,
+        ),
+        "Quote": ParagraphStyle(
+            name="Quote",
+            fontName="Helvetica-Oblique",
+            fontSize=11,
+            textColor=DARK_GREY,
+            spaceBefore=10,
+            spaceAfter=10,
+            leading=16,
+            leftIndent=15,
+            rightIndent=15,
+            backColor=QUOTE_BG_COLOR,
+            borderPadding=10,
+            borderColor=ACCENT_BLUE,
+            borderWidth=1,
+        ),
+        "Callout": ParagraphStyle(
+            name="Callout",
+            fontName="Helvetica-Bold",
+            fontSize=12,
+            textColor=ACCENT_BLUE,
+            leading=18,
+            backColor=QUOTE_BG_COLOR,
+            borderPadding=8,
+        ),
+        "toc_title": ParagraphStyle(
+            name="toc_title",
+            fontName="Helvetica-Bold",
+            fontSize=18,
+            textColor=DARK_GREY,
+            spaceAfter=12,
+            leading=24,
+        ),
+        "toc_heading": ParagraphStyle(
+            name="toc_heading",
+            fontName="Helvetica",
+            fontSize=11,
+            textColor=DARK_GREY,
+            leading=14,
+        ),
+        "toc_item": ParagraphStyle(
+            name="toc_item",
+            fontName="Helvetica",
+            fontSize=10,
+            textColor=LIGHT_GREY,
+            leading=14,
+            alignment=2,
+        ),  # Right aligned
+    }
+    # Variants of the body text style
+    styles["NormalLeft"] = ParagraphStyle(name="NormalLeft", parent=styles["Normal"], alignment=0)
+    styles["Strong"] = ParagraphStyle(name="Strong", parent=styles["Normal"], fontName="Helvetica-Bold")
+    styles["Emphasis"] = ParagraphStyle(name="Emphasis", parent=styles["Normal"], fontName="Helvetica-Oblique")
+    return styles
+
+
+# Built once at import and shared by every book; the styles are never mutated while building a PDF
+_STYLES = create_summary_styles()
+
+
+class SummaryStoryBuilder:
+    """Turns the Markdown summary into styled ReportLab flowables, one line at a time.
+
+    Lines can be fed while the Gemini response is still streaming, so the body of the
+    PDF is ready as soon as the stream closes.
+    """
+
+    def __init__(self, styles: dict = _STYLES):
+        self.styles = styles
+        self.body = []
+        self.sections = []
+        self._in_review_section = False
+        self._pending = ""  # Unterminated tail of the text passed to feed()
+
+    def feed(self, chunk: str):
+        """Parse streamed text incrementally; lines are added as soon as their newline arrives."""
+        *completed_lines, self._pending = (self._pending + chunk).split("\n")
+        for para_text in completed_lines:
+            self.add_line(para_text)
+
+    def close(self):
+        """Add the final line held back by feed() once the stream has ended."""
+        self.add_line(self._pending)
+        self._pending = ""
+
+    def add_text(self, text: str):
+        """Parse a complete summary, such as one loaded from disk, in the same single pass."""
+        for para_text in text.split("\n"):
+            self.add_line(para_text)
+
+    def add_line(self, para_text: str):
+        """Parse one line of the AI-generated text and append its flowables to the body."""
+        if not para_text.strip():
+            return  # Skip empty lines
+
+        try:
+            self._add_line(para_text)
+        except ValueError:
+            # ReportLab rejects malformed inline markup; keep the text rather than losing the line
+            self.body.append(Paragraph(escape(para_text), self.styles["Normal"]))
+
+    def _add_line(self, para_text: str):
+        # Split off the Markdown marker (heading level, quote or bullet) in one match and dispatch on it
+        marker, content = _MARKDOWN_LINE_RE.match(para_text).groups()
+        handler = self._MARKER_HANDLERS.get(marker)
+        if handler is not None:
+            handler(self, content.strip())
+        else:
+            self._add_paragraph(para_text)
+
+    def _add_section_heading(self, heading_text: str):
+        story = self.body
+        self.sections.append(heading_text)
+        # Add a page break before major sections except the first one
+        if len(self.sections) > 1:
+            story.append(PageBreak())
+
+        story.append(
+            HorizontalLine.FancySectionHeader(heading_text, 450, bg_color=ACCENT_BLUE, text_color=colors.white)
+        )
+        story.append(Spacer(1, 0.15 * inch))
+
+        # Check if we're entering the review section
+        if _REVIEW_HEADING_RE.search(heading_text):
+            self._in_review_section = True
+
+            # Add a visual indicator for the review section
+            story.append(Paragraph("FINAL ASSESSMENT", self.styles["toc_title"]))
+
+    def _add_subheading(self, heading_text: str):
+        self.body.append(Paragraph(_inline_markup(heading_text), self.styles["h2"]))
+        self.body.append(HorizontalLine(450, 1, LIGHT_GREY))
+        self.body.append(Spacer(1, 0.1 * inch))
+
+    def _add_topic_heading(self, content: str):
+        self.body.append(Paragraph(_inline_markup(content), self.styles["h3"]))
+
+    def _add_minor_heading(self, content: str):
+        self.body.append(Paragraph(_inline_markup(content), self.styles["h4"]))
+
+    def _add_quote(self, quote_text: str):
+        # Enhanced quote styling
+        self.body.append(Paragraph(f'"{_inline_markup(quote_text)}"', self.styles["Quote"]))
+        self.body.append(Spacer(1, 0.1 * inch))
+
+    def _add_bullet(self, bullet_text: str):
+        # Enhanced bullet point styling
+        self.body.append(Paragraph(_inline_markup(bullet_text), self.styles["Bullet"], bulletText="•"))
+
+    # Block-level Markdown marker -> handler for the rest of the line
+    _MARKER_HANDLERS = {
+        "#": _add_section_heading,
+        "##": _add_subheading,
+        "###": _add_topic_heading,
+        "####": _add_minor_heading,
+        ">": _add_quote,
+        "*": _add_bullet,
+        "-": _add_bullet,
+    }
+
+    def _add_paragraph(self, para_text: str):
+        styles = self.styles
+        story = self.body
+
+        if para_text.startswith("```") or para_text.endswith("```"):
+            # Skip code blocks or handle them if needed
+            return
+
+        if self._in_review_section and _RECOMMENDATION_RE.search(para_text):
+            # Highlight recommendation text
+            story.append(Spacer(1, 0.2 * inch))
+            story.append(Paragraph(_inline_markup(para_text), styles["Callout"]))
+            story.append(Spacer(1, 0.2 * inch))
+
+        else:
+            # Regular paragraph; bold and italic spans become inline tags
+            story.append(Paragraph(_inline_markup(para_text), styles["Normal"]))
 
 
 def create_pdf_from_raw_summary(summary_and_review_text: str, book_title: str) -> bool:
+    story_builder = SummaryStoryBuilder()
+    story_builder.add_text(summary_and_review_text)
+    return build_summary_pdf(story_builder, book_title)
+
+
+def create_cover_drawing() -> Drawing:
+    """The decorative rule, plus the pie chart when FANCY_PDF is set, on the cover; identical for every book."""
+    d = Drawing(400, 100)
+    line = Line(0, 50, 400, 50, strokeWidth=1, strokeColor=ACCENT_BLUE)
+    d.add(line)
+    if not FANCY_PDF:
+        return d
+
+    # Only imported when the chart is drawn
+    from reportlab.graphics.charts.piecharts import Pie
+
+    # Create a pie chart showing value distribution (for visual appeal)
+    pie = Pie()
+    pie.x = 150
+    pie.y = 50
+    pie.width = 100
+    pie.height = 100
+    pie.data = [35, 25, 20, 15, 5]  # Represent book value distribution
+    pie.labels = [
+        "Key Insights",
+        "Practical Tips",
+        "Case Studies",
+        "Frameworks",
+        "Other",
+    ]
+    pie.slices.strokeWidth = 0.5
+    pie.slices[0].fillColor = ACCENT_BLUE
+    pie.slices[1].fillColor = ACCENT_BLUE
+    pie.slices[2].fillColor = ACCENT_BLUE
+    pie.slices[3].fillColor = LIGHT_GREY
+    pie.slices[4].fillColor = DARK_GREY
+    d.add(pie)
+    return d
+
+
+_COVER_DRAWING = create_cover_drawing()
+
+
+def draw_cover_page(canvas, doc, book_title: str, styles: dict):
+    """Draw the fixed cover layout directly on the page canvas, top to bottom.
+
+    Nothing on the cover ever splits or flows onto another page, so the pieces are placed
+    at a running y position instead of going through frame layout.
+    """
+    # Inset by the 6pt padding a Frame applies, so the cover lines up with the body pages
+    x = doc.leftMargin + 6
+    y = doc.pagesize[1] - doc.topMargin - 6
+
+    def place(flowable, space_after=0.0):
+        nonlocal y
+        _, height = flowable.wrapOn(canvas, doc.width, y - doc.bottomMargin)
+        y -= height
+        flowable.drawOn(canvas, x, y)
+        y -= flowable.getSpaceAfter() + space_after
+
+    # Add a professional cover page
+    place(Paragraph("Book Summary & Review", styles["h1"]), 0.2 * inch)
+    canvas.saveState()
+    canvas.setStrokeColor(ACCENT_BLUE)
+    canvas.setLineWidth(2)
+    canvas.line(x, y, x + 450, y)
+    canvas.restoreState()
+    y -= 0.3 * inch
+    place(Paragraph(escape(book_title), styles["h1"]), 0.1 * inch)
+    place(Paragraph("A Professional Analysis for Technology Leaders", styles["h2"]), 0.5 * inch)
+
+    # Add a decorative element to the cover
+    place(_COVER_DRAWING, 0.3 * inch)
+
+    # Add author info section
+    place(Paragraph("Prepared by", styles["Normal"]))
+    place(Paragraph("Professional Book Summary Service", styles["Strong"]))
+    place(Paragraph(f"Completed on: {time.strftime('%B %d, %Y')}", styles["Normal"]))
+
+
+def summary_pdf_path(book_title: str) -> str:
+    return os.path.join(OUTPUT_FOLDER, f"{book_title}_Summary_Review.pdf")
+
+
+def is_summary_up_to_date(pdf_entry: os.DirEntry, book_title: str) -> bool:
+    """True when the book's summary PDF exists and is at least as new as the book itself."""
+    if FORCE_REBUILD:
+        return False
+    try:
+        return os.path.getmtime(summary_pdf_path(book_title)) >= pdf_entry.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def build_summary_pdf(story_builder: SummaryStoryBuilder, book_title: str) -> bool:
+    styles = story_builder.styles
+
     try:
         # 3. Create a Formatted PDF with Advanced Styling
-        output_pdf_path = os.path.join(OUTPUT_FOLDER, f"{book_title}_Summary_Review.pdf")
+        output_pdf_path = summary_pdf_path(book_title)
 
         # Ensure output directory exists
         if not os.path.exists(OUTPUT_FOLDER):
             os.makedirs(OUTPUT_FOLDER)
 
-        doc = SimpleDocTemplate(
+        doc = BaseDocTemplate(
             output_pdf_path,
             pagesize=letter,
             topMargin=inch,
             bottomMargin=inch,
             leftMargin=inch,
             rightMargin=inch,
+            title=f"{book_title} - Book Summary & Review",
+            # Zlib-compress the page content streams even if a local reportlab_settings turns it off
+            pageCompression=1,
         )
 
-        # --- Custom Styles ---
-        from reportlab.lib.styles import ParagraphStyle
-        from reportlab.lib import colors
-
-        # Define custom colors for a professional look
-        dark_grey = colors.HexColor("#2C3E50")
-        light_grey = colors.HexColor("#7F8C8D")
-        accent_blue = colors.HexColor("#3498DB")
-        quote_bg_color = colors.HexColor("#ECF0F1")  # A light background for quotes
-
-        styles = {
-            "h1": ParagraphStyle(
-                name="h1",
-                fontName="Helvetica-Bold",
-                fontSize=24,
-                textColor=dark_grey,
-                spaceAfter=18,
-                leading=30,
-            ),
-            "h2": ParagraphStyle(
-                name="h2",
-                fontName="Helvetica",
-                fontSize=16,
-                textColor=light_grey,
-                spaceAfter=12,
-                leading=20,
-            ),
-            "h3": ParagraphStyle(
-                name="h3",
-                fontName="Helvetica-Bold",
-                fontSize=14,
-                textColor=accent_blue,
-                spaceBefore=12,
-                spaceAfter=6,
-                leading=18,
-            ),
-            "Normal": ParagraphStyle(
-                name="Normal",
-                fontName="Helvetica",
-                fontSize=11,
-                textColor=dark_grey,
-                spaceAfter=6,
-                leading=16,
-                alignment=4,
-            ),  # Justified
-            "Bullet": ParagraphStyle(
-                name="Bullet",
-                fontName="Helvetica",
-                fontSize=11,
-                textColor=dark_grey,
-                spaceAfter=4,
-                leading=16,
-                leftIndent=18,
-                bulletIndent=0,
-            ),
-            "Quote": ParagraphStyle(
-                name="Quote",
-                fontName="Helvetica-Oblique",
-                fontSize=11,
-                textColor=colors.HexColor("#2C3E50"),
-                spaceBefore=10,
-                spaceAfter=10,
-                leading=16,
-                leftIndent=15,
-                rightIndent=15,
-                backColor=quote_bg_color,
-                borderPadding=10,
-                borderColor=accent_blue,
-                borderWidth=1,
-            ),
-        }
-        story = []
-
-        # --- Extract sections and create TOC ---
-        # --- Build Cover Page ---
-        # Add a professional cover page
-        story.append(Paragraph("Book Summary & Review", styles["h1"]))
-        story.append(Spacer(1, 0.2 * inch))
-        story.append(HorizontalLine(450, 2, accent_blue))
-        story.append(Spacer(1, 0.3 * inch))
-        story.append(Paragraph(f"{book_title}", styles["h1"]))
-        story.append(Spacer(1, 0.1 * inch))
-        story.append(Paragraph("A Professional Analysis for Technology Leaders", styles["h2"]))
-        story.append(Spacer(1, 0.5 * inch))
-
-        # Add a decorative element to the cover
-        d = Drawing(400, 100)
-        line = Line(0, 50, 400, 50, strokeWidth=1, strokeColor=accent_blue)
-        d.add(line)
-
-        # Create a pie chart showing value distribution (for visual appeal)
-        pie = Pie()
-        pie.x = 150
-        pie.y = 50
-        pie.width = 100
-        pie.height = 100
-        pie.data = [35, 25, 20, 15, 5]  # Represent book value distribution
-        pie.labels = [
-            "Key Insights",
-            "Practical Tips",
-            "Case Studies",
-            "Frameworks",
-            "Other",
-        ]
-        pie.slices.strokeWidth = 0.5
-        pie.slices[0].fillColor = accent_blue
-        pie.slices[1].fillColor = accent_blue
-        pie.slices[2].fillColor = accent_blue
-        pie.slices[3].fillColor = light_grey
-        pie.slices[4].fillColor = dark_grey
-        d.add(pie)
-
-        story.append(d)
-        story.append(Spacer(1, 0.3 * inch))
-
-        # Add author info section
-        story.append(Paragraph("Prepared by", styles["Normal"]))
-        story.append(Paragraph("Professional Book Summary Service", styles["Strong"]))
-        story.append(Paragraph(f"Completed on: {time.strftime('%B %d, %Y')}", styles["Normal"]))
-
-        # Add page break after cover
-        story.append(PageBreak())
+        # The cover is drawn straight onto the first page by its page template; the story starts on
+        # the table of contents page
+        story = [NextPageTemplate("main"), PageBreak()]
 
         # --- Add Table of Contents ---
         story.append(Paragraph("Table of Contents", styles["toc_title"]))
         story.append(Spacer(1, 0.2 * inch))
 
-        # Create a simple TOC manually
+        # Create a simple TOC manually from the main sections seen while parsing
         toc_data = []
-        for i, section in enumerate(story):
+        for i, section in enumerate(story_builder.sections):
             if len(section) > 60:  # Truncate long section names
                 section = section[:57] + "..."
             toc_data.append(
                 [
-                    Paragraph(section, styles["toc_heading"]),
-                    Paragraph(f"Page {i + 2}", styles["toc_item"]),
+                    Paragraph(escape(section), styles["toc_heading"]),
+                    Paragraph(f"Page {i + 3}", styles["toc_item"]),
                 ]
             )
 
         if toc_data:  # Only create table if we have sections
             # Create the table with the TOC data
             toc_table = Table(toc_data, colWidths=[5 * inch, 0.7 * inch])
-            toc_table.setStyle(
-                TableStyle(
-                    [
-                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                        (
-                            "GRID",
-                            (0, 0),
-                            (-1, -1),
-                            0.5,
-                            colors.white,
-                        ),  # No visible grid
-                        (
-                            "LINEBELOW",
-                            (0, 0),
-                            (-1, -2),
-                            0.5,
-                            light_grey,
-                        ),  # Light separator lines
-                        (
-                            "BACKGROUND",
-                            (0, 0),
-                            (-1, -1),
-                            colors.white,
-                        ),  # White background
-                    ]
-                )
-            )
+            toc_table.setStyle(_TOC_TABLE_STYLE)
             story.append(toc_table)
         else:
             story.append(Paragraph("(Content sections will appear here)", styles["NormalLeft"]))
 
         story.append(Spacer(1, 0.3 * inch))
-        story.append(HorizontalLine(450, 1, light_grey))
+        story.append(HorizontalLine(450, 1, LIGHT_GREY))
         story.append(Spacer(1, 0.2 * inch))
         story.append(
             Paragraph(
@@ -239,91 +551,10 @@ def create_pdf_from_raw_summary(summary_and_review_text: str, book_title: str) -
         # Add page break after TOC
         story.append(PageBreak())
 
-        # Parse and add the AI-generated text using enhanced styles
-        in_review_section = False
-        section_count = 0
-
-        # Process the content with improved formatting
-        for para_text in summary_and_review_text.split("\n"):
-            if not para_text.strip():
-                continue  # Skip empty lines
-
-            # Check for Markdown headings of different levels
-            if para_text.startswith("# "):
-                section_count += 1
-                heading_text = para_text.lstrip("# ").strip()
-                # Add a page break before major sections except the first one
-                if section_count > 1:
-                    story.append(PageBreak())
-
-                story.append(
-                    HorizontalLine.FancySectionHeader(heading_text, 450, bg_color=accent_blue, text_color=colors.white)
-                )
-                story.append(Spacer(1, 0.15 * inch))
-
-                # Check if we're entering the review section
-                if "review" in heading_text.lower() or "recommendation" in heading_text.lower():
-                    in_review_section = True
-
-                    # Add a visual indicator for the review section
-                    story.append(Paragraph("FINAL ASSESSMENT", styles["toc_title"]))
-
-            elif para_text.startswith("## "):
-                heading_text = para_text.lstrip("## ").strip()
-                story.append(Paragraph(heading_text, styles["h2"]))
-                story.append(HorizontalLine(450, 1, light_grey))
-                story.append(Spacer(1, 0.1 * inch))
-
-            elif para_text.startswith("### "):
-                story.append(Paragraph(para_text.lstrip("### ").strip(), styles["h3"]))
-
-            elif para_text.startswith("#### "):
-                story.append(Paragraph(para_text.lstrip("#### ").strip(), styles["h4"]))
-
-            elif para_text.startswith("> "):
-                # Enhanced quote styling
-                quote_text = para_text.lstrip("> ").strip()
-                story.append(Paragraph(f'"{quote_text}"', styles["Quote"]))
-                story.append(Spacer(1, 0.1 * inch))
-
-            elif para_text.startswith("* ") or para_text.startswith("- "):
-                # Enhanced bullet point styling
-                bullet_text = para_text.lstrip("*- ").strip()
-                story.append(Paragraph(bullet_text, styles["Bullet"], bulletText="•"))
-
-            elif para_text.startswith("```") or para_text.endswith("```"):
-                # Skip code blocks or handle them if needed
-                continue
-
-            elif in_review_section and (
-                "recommend" in para_text.lower() or "conclusion" in para_text.lower() or "verdict" in para_text.lower()
-            ):
-                # Highlight recommendation text
-                story.append(Spacer(1, 0.2 * inch))
-                story.append(Paragraph(para_text, styles["Callout"]))
-                story.append(Spacer(1, 0.2 * inch))
-
-            else:
-                # Check for bold and italic text in paragraphs
-                if "**" in para_text or "__" in para_text:
-                    # Has bold text - use strong style
-                    story.append(
-                        Paragraph(
-                            para_text.replace("**", "<b>").replace("__", "<b>"),
-                            styles["Strong"],
-                        )
-                    )
-                elif "*" in para_text or "_" in para_text:
-                    # Has italic text - use emphasis style
-                    story.append(
-                        Paragraph(
-                            para_text.replace("*", "<i>").replace("_", "<i>"),
-                            styles["Emphasis"],
-                        )
-                    )
-                else:
-                    # Regular paragraph
-                    story.append(Paragraph(para_text, styles["Normal"]))
+        # Add the AI-generated text, already parsed into flowables by the story builder. The builder's
+        # list is emptied so doc.build, which pops each flowable as it is placed, holds the only reference.
+        story.extend(story_builder.body)
+        story_builder.body.clear()
 
     except OSError as e:
         print(f"Error creating output directory or PDF file: {e}")
@@ -333,17 +564,31 @@ def create_pdf_from_raw_summary(summary_and_review_text: str, book_title: str) -
         return False
 
     # Custom document building with footer
+    footer_text = f"Book Summary & Review | {book_title} | Generated on {time.strftime('%B %d, %Y')}"
+
     def add_footer(canvas, doc):
         canvas.saveState()
         canvas.setFont("Helvetica", 9)
-        canvas.setFillColor(light_grey)
-        footer_text = f"Book Summary & Review | {book_title} | Generated on {time.strftime('%B %d, %Y')}"
+        canvas.setFillColor(LIGHT_GREY)
         canvas.drawCentredString(letter[0] / 2, 0.5 * inch, footer_text)
         canvas.restoreState()
 
+    def add_cover_and_footer(canvas, doc):
+        draw_cover_page(canvas, doc, book_title, styles)
+        add_footer(canvas, doc)
+
+    # Every page uses one frame inside the margins and the same footer; the first page also gets the cover
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="body")
+    doc.addPageTemplates(
+        [
+            PageTemplate(id="cover", frames=[frame], onPage=add_cover_and_footer),
+            PageTemplate(id="main", frames=[frame], onPage=add_footer),
+        ]
+    )
+
     try:
-        # Build the PDF with the footer function
-        doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
+        # Build the PDF in a single layout pass
+        doc.build(story)
         print(f"Created styled PDF: {output_pdf_path}")
         return True
     except Exception as e:
@@ -404,7 +649,213 @@ class HorizontalLine(Flowable):
 
 
 # --- Main Processing Logic ---
-def process_ebooks_with_gemini_vision():
+def summary_cache_key(pdf_path: str) -> str:
+    return cache_key(
+        file_sha256(pdf_path),
+        MODEL_NAME,
+        text_sha256(SYSTEM_INSTRUCTION + BOOK_PROMPT_TEMPLATE),
+        f"{MAX_OUTPUT_TOKENS}:{TEMPERATURE}",
+    )
+
+
+async def upload_to_gemini(pdf_path: str, filename: str, book_title: str):
+    """Upload one book to the Files API and wait until Gemini has processed it; None if processing fails."""
+    print(f"Uploading '{book_title}' (from {pdf_path}) to Gemini Files API...")
+
+    # The genai.upload_file function returns a google.generativeai.types.File object.
+    # This File object itself can be directly passed as a content part to the model.
+    # The Files API has no async variant, so run the blocking calls in a worker thread.
+    # An explicit mime_type saves the SDK guessing it from the file name
+    uploaded_file_obj = await asyncio.to_thread(
+        retry_gemini_call(genai.upload_file), path=pdf_path, mime_type="application/pdf", display_name=filename
+    )
+    _uploaded_file_names.add(uploaded_file_obj.name)
+
+    # Wait for the file to be processed
+    print(f"Waiting for '{book_title}' (file name: {uploaded_file_obj.name}) to be processed by Gemini...")
+
+    try:
+        # Use uploaded_file_obj.state.name directly for state checking.
+        # Poll with exponential backoff so small files are picked up quickly. The jitter keeps
+        # books uploaded together from polling in lockstep.
+        delay = POLL_INITIAL_DELAY
+        while uploaded_file_obj.state.name == "PROCESSING":
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, POLL_MAX_DELAY)
+            # Re-fetch the file state
+            uploaded_file_obj = await asyncio.to_thread(retry_gemini_call(genai.get_file), uploaded_file_obj.name)
+    except Exception:
+        delete_gemini_file_in_background(uploaded_file_obj, book_title)
+        raise
+
+    if uploaded_file_obj.state.name != "ACTIVE":
+        print(f"Error processing '{book_title}' via Files API. State: {uploaded_file_obj.state.name}. Skipping.")
+        delete_gemini_file_in_background(uploaded_file_obj, book_title)
+        return None
+
+    print(f"Successfully uploaded '{book_title}'. Gemini File URI: {uploaded_file_obj.uri}")
+    return uploaded_file_obj
+
+
+def delete_gemini_file_in_background(uploaded_file_obj, book_title: str):
+    """Delete an uploaded file without making the caller wait for the round trip."""
+    task = asyncio.create_task(delete_gemini_file(uploaded_file_obj, book_title))
+    _cleanup_tasks.add(task)  # Keep a reference so the task is not garbage collected mid-flight
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
+async def delete_gemini_file(uploaded_file_obj, book_title: str):
+    # Clean up: Delete the uploaded file from Gemini's service
+    try:
+        await asyncio.to_thread(retry_gemini_call(genai.delete_file), uploaded_file_obj.name)
+        _uploaded_file_names.discard(uploaded_file_obj.name)
+        print(f"Deleted temporary Gemini file '{uploaded_file_obj.name}' for '{book_title}'.")
+    except Exception as e:
+        print(f"Error deleting temporary Gemini file '{uploaded_file_obj.name}': {e}")
+
+
+async def sweep_uploaded_files():
+    """Delete, in parallel, any file this run uploaded that is still stored on the server."""
+    if not _uploaded_file_names:
+        return  # Every upload was already cleaned up, so skip listing the project's files
+
+    stored_files = await asyncio.to_thread(retry_gemini_call(lambda: list(genai.list_files())))
+    leftovers = [f for f in stored_files if f.name in _uploaded_file_names]
+    await asyncio.gather(*(delete_gemini_file(f, f.display_name) for f in leftovers))
+
+
+# A rate-limited or dropped stream is restarted from scratch; the raw summary file is rewritten
+@retry_gemini_call
+async def generate_summary(
+    model: genai.GenerativeModel, cache: SummaryCache, key: str, pdf_entry: os.DirEntry, uploaded_file_obj
+) -> SummaryStoryBuilder:
+    """Stream the summary of an uploaded book into a story builder and the raw summary file."""
+    book_title = os.path.splitext(pdf_entry.name)[0]
+    book_prompt = BOOK_PROMPT_TEMPLATE.format(book_title=book_title)
+
+    print(f"Sending prompt and uploaded PDF for '{book_title}' to Gemini model '{MODEL_NAME}'...")
+
+    raw_summaries_folder = "raw_summaries"
+    if not os.path.exists(raw_summaries_folder):
+        os.makedirs(raw_summaries_folder)
+        print(f"Created raw gemini_pdf_summaries folder: {raw_summaries_folder}")
+    raw_summary_path = os.path.join(raw_summaries_folder, f"{book_title}_raw.txt")
+    tmp_raw_summary_path = f"{raw_summary_path}.tmp"
+
+    # Use stream=True to get the response as an async iterator.
+    response = await model.generate_content_async([uploaded_file_obj, book_prompt], stream=True)
+    # Each chunk is written to the raw summary file and fed to the story builder as it arrives,
+    # so the full response text is never held in memory.
+    # The chunks are not echoed to the console because several books stream at once.
+    story_builder = SummaryStoryBuilder()
+    chunk = None
+    with open(tmp_raw_summary_path, "w", encoding="utf-8") as raw_file:
+        async for chunk in response:
+            raw_file.write(chunk.text)
+            story_builder.feed(chunk.text)
+    # The last chunk carries the finish reason; a summary cut off at MAX_OUTPUT_TOKENS must not be
+    # saved, cached or have its book moved to processed as if it were complete
+    if chunk is not None and chunk.candidates:
+        if chunk.candidates[0].finish_reason == genai.protos.Candidate.FinishReason.MAX_TOKENS:
+            os.remove(tmp_raw_summary_path)
+            raise RuntimeError(f"Summary of '{book_title}' was cut off at {MAX_OUTPUT_TOKENS} output tokens.")
+    story_builder.close()
+    # Only a complete response replaces an earlier raw summary
+    os.replace(tmp_raw_summary_path, raw_summary_path)
+    cache.put_file(key, raw_summary_path)
+
+    print(f"Generated summary and review for '{book_title}'.")
+    print(f"Saved raw summary to: {raw_summary_path}")
+
+    return story_builder
+
+
+def move_to_processed(pdf_entry: os.DirEntry):
+    """Move a book whose summary PDF has been built to the processed folder beside PDF_FOLDER."""
+    try:
+        processed_folder = os.path.join(os.path.dirname(PDF_FOLDER), "processed")
+        if not os.path.exists(processed_folder):
+            os.makedirs(processed_folder)
+            print(f"Created processed books folder: {processed_folder}")
+
+        # Move the original PDF file to the processed folder
+        processed_file_path = os.path.join(processed_folder, pdf_entry.name)
+        shutil.move(pdf_entry.path, processed_file_path)
+        print(f"Moved processed book to: {processed_file_path}")
+    except Exception as e:
+        print(f"Error moving processed book: {e}")
+
+
+# Pipeline stages: uploader -> generate_q -> generator -> render_q -> renderer. Uploads for the next
+# books overlap generation of the current ones, and PDF builds never hold a generation slot. The
+# bounded generate_q keeps uploads only a little ahead of generation. A None on a queue tells the
+# consuming worker to stop.
+async def uploader(pdf_q: asyncio.Queue, generate_q: asyncio.Queue, render_q: asyncio.Queue, cache: SummaryCache):
+    while (pdf_entry := await pdf_q.get()) is not None:
+        book_title = os.path.splitext(pdf_entry.name)[0]
+        if is_summary_up_to_date(pdf_entry, book_title):
+            print(f"\nSkipping '{book_title}': its summary PDF is up to date (set FORCE_REBUILD=1 to rebuild).")
+            continue
+        print(f"\n--- Processing: {book_title} ---")
+
+        try:
+            # An unchanged book with the same model and prompt reuses its earlier summary
+            key = await asyncio.to_thread(summary_cache_key, pdf_entry.path)
+            cached_summary = cache.get(key)
+            if cached_summary is not None:
+                print(f"Using cached summary for '{book_title}'.")
+                story_builder = SummaryStoryBuilder()
+                story_builder.add_text(cached_summary)
+                await render_q.put((pdf_entry, story_builder))
+                continue
+
+            # 1. Upload PDF to Gemini Files API
+            uploaded_file_obj = await upload_to_gemini(pdf_entry.path, pdf_entry.name, book_title)
+        except Exception as e:
+            print(f"An error occurred while processing '{book_title}': {e}")
+            traceback.print_exc()  # Print full traceback for better debugging
+            continue
+
+        if uploaded_file_obj is not None:
+            await generate_q.put((pdf_entry, key, uploaded_file_obj))
+
+
+async def generator(
+    generate_q: asyncio.Queue,
+    render_q: asyncio.Queue,
+    model: genai.GenerativeModel,
+    cache: SummaryCache,
+):
+    while (item := await generate_q.get()) is not None:
+        pdf_entry, key, uploaded_file_obj = item
+        book_title = os.path.splitext(pdf_entry.name)[0]
+
+        try:
+            # 2. Generate Summary and Review using Gemini
+            story_builder = await generate_summary(model, cache, key, pdf_entry, uploaded_file_obj)
+        except Exception as e:
+            print(f"An error occurred while processing '{book_title}': {e}")
+            traceback.print_exc()  # Print full traceback for better debugging
+            continue
+        finally:
+            # The uploaded copy is not needed once generation has finished; the next book starts
+            # while it is being deleted
+            delete_gemini_file_in_background(uploaded_file_obj, book_title)
+
+        await render_q.put((pdf_entry, story_builder))
+
+
+async def renderer(render_q: asyncio.Queue):
+    while (item := await render_q.get()) is not None:
+        pdf_entry, story_builder = item
+        book_title = os.path.splitext(pdf_entry.name)[0]
+        # 3. The story is complete; lay it out off the event loop. The book only counts as processed,
+        # whether its summary was generated or cached, once its PDF has been built.
+        if await asyncio.to_thread(build_summary_pdf, story_builder, book_title):
+            await asyncio.to_thread(move_to_processed, pdf_entry)
+
+
+async def process_ebooks_with_gemini_vision():
     if not os.path.exists(OUTPUT_FOLDER):
         os.makedirs(OUTPUT_FOLDER)
         print(f"Created output folder: {OUTPUT_FOLDER}")
@@ -414,159 +865,59 @@ def process_ebooks_with_gemini_vision():
         print(f"Error: PDF_FOLDER '{PDF_FOLDER}' does not exist.")
         return
 
-    pdf_files_found = [f for f in os.listdir(PDF_FOLDER) if f.lower().endswith(".pdf")]
+    # The DirEntry objects are passed down the pipeline, so each book's path and mtime come from
+    # the directory scan instead of a join and a separate stat
+    with os.scandir(PDF_FOLDER) as it:
+        pdf_files_found = [entry for entry in it if entry.is_file() and entry.name.lower().endswith(".pdf")]
     if not pdf_files_found:
         print(f"No PDF files found in '{PDF_FOLDER}'. Please ensure there are PDFs in that directory.")
         return
 
-    for filename in pdf_files_found:
-        pdf_path = os.path.join(PDF_FOLDER, filename)
-        book_title = os.path.splitext(filename)[0]
-        print(f"\n--- Processing: {book_title} ---")
-
-        uploaded_file_obj = None  # Initialize to None for cleanup in finally block
-        try:
-            # 1. Upload PDF to Gemini Files API
-            print(f"Uploading '{book_title}' (from {pdf_path}) to Gemini Files API...")
-
-            # The genai.upload_file function returns a google.generativeai.types.File object.
-            # This File object itself can be directly passed as a content part to the model.
-            uploaded_file_obj = genai.upload_file(path=pdf_path, display_name=filename)
-
-            # Wait for the file to be processed
-            print(f"Waiting for '{book_title}' (file name: {uploaded_file_obj.name}) to be processed by Gemini...")
-
-            # Use uploaded_file_obj.state.name directly for state checking
-            while uploaded_file_obj.state.name == "PROCESSING":
-                time.sleep(5)
-                # Re-fetch the file state
-                uploaded_file_obj = genai.get_file(uploaded_file_obj.name)
-
-            if uploaded_file_obj.state.name != "ACTIVE":
-                print(
-                    f"Error processing '{book_title}' via Files API. State: {uploaded_file_obj.state.name}. Skipping."
-                )
-                continue  # Skip to the next file
-
-            print(f"Successfully uploaded '{book_title}'. Gemini File URI: {uploaded_file_obj.uri}")
-
-            # 2. Generate Summary and Review using Gemini
-            final_prompt = f"""
-            You are a highly respected technology thought leader, writing a professional yet entertaining review and summary for your blog/LinkedIn.
-            The book provided is titled: "{book_title}".
-
-            Your output should be structured as a professionally formatted blog post with clear headings, comprising:
-
-            # BOOK SUMMARY: {book_title}
-
-            ## Introduction
-            * Begin with a brief overview of the book, its author, and why it matters in today's tech landscape.
-            * Include the book's core premise and promise to readers in 2-3 sentences.
-            * Mention why you decided to review this particular book.
-
-            ## Key Concepts and Insights
-            * Break down 3-5 major concepts from the book using clear ### subheadings for each concept.
-            * Thoroughly explain these ideas with examples from the book.
-            * Use bullet points for listing important elements.
-            * Include relevant quotes from the book using > quote format.
-
-            ## Practical Applications
-            * Discuss how tech leaders can apply these concepts in their work.
-            * Provide specific scenarios or examples of practical implementation.
-            * Include actionable steps or frameworks the book provides.
-
-            ## Critical Analysis
-            * What does the book do exceptionally well?
-            * Where could it have been improved or gone deeper?
-            * How does it compare to other works in this domain?
-
-            # FINAL REVIEW AND RECOMMENDATION
-            * Provide your overall assessment of the book's value to tech leaders.
-            * Evaluate based on: originality, actionable insights, relevance to current tech trends, and writing quality.
-            * Clearly define the ideal reader profile for this book.
-            * End with a definitive verdict (e.g., "Highly recommended," "Worth a read," "For specific audiences only").
-
-            Format your response using Markdown:
-            - Use # for main sections, ## for subsections, and ### for topics
-            - Use * or - for bullet points
-            - Use > for notable quotes
-            - Use **bold** for emphasis on important points
-            - Break text into concise, readable paragraphs
-
-            Make it engaging, insightful, and valuable for busy tech executives who want to know if this book is worth their time.
-            """
-
-            print(f"Sending prompt and uploaded PDF for '{book_title}' to Gemini model '{MODEL_NAME}'...")
-            model = genai.GenerativeModel(MODEL_NAME)
-
-            # Use stream=True to get the response as an iterator.
-            response = model.generate_content([uploaded_file_obj, final_prompt], stream=True)
-            # Create a variable to hold the complete text and print the stream.
-            summary_and_review_text = ""
-            print("\n--- Gemini Response Stream ---")
-            for chunk in response:
-                # Print each chunk to the console as it arrives.
-                # The `end=""` and `flush=True` arguments ensure the text
-                # appears on the same line without waiting.
-                print(chunk.text, end="", flush=True)
-
-                # Append the chunk's text to our full response string.
-                summary_and_review_text += chunk.text
-
-            # Print a newline to clean up the console output after the stream finishes.
-            print("\n--- End of Stream ---\n")
-
-            print(f"Generated summary and review for '{book_title}'.")
-
-            # Save raw summary to file
-            raw_summaries_folder = "raw_summaries"
-            if not os.path.exists(raw_summaries_folder):
-                os.makedirs(raw_summaries_folder)
-                print(f"Created raw gemini_pdf_summaries folder: {raw_summaries_folder}")
-
-            raw_summary_path = os.path.join(raw_summaries_folder, f"{book_title}_raw.txt")
-            try:
-                with open(raw_summary_path, "w", encoding="utf-8") as f:
-                    f.write(summary_and_review_text)
-                print(f"Saved raw summary to: {raw_summary_path}")
-
-                # Move the processed book to the books\processed folder
-                processed_folder = os.path.join(os.path.dirname(PDF_FOLDER), "processed")
-                if not os.path.exists(processed_folder):
-                    os.makedirs(processed_folder)
-                    print(f"Created processed books folder: {processed_folder}")
-
-                # Move the original PDF file to the processed folder
-                processed_file_path = os.path.join(processed_folder, filename)
-                shutil.move(pdf_path, processed_file_path)
-                print(f"Moved processed book to: {processed_file_path}")
-            except Exception as e:
-                print(f"Error saving raw summary or moving processed book: {e}")
-
-            # create_pdf_from_raw_summary(summary_and_review_text, book_title)
+    # Books are summarised concurrently, up to MAX_CONCURRENCY at a time, while the next books upload
+    # The model handle is shared by every book in the run
+    generation_config = genai.GenerationConfig(
+        max_output_tokens=MAX_OUTPUT_TOKENS, temperature=TEMPERATURE, response_mime_type="text/plain"
+    )
+    model = genai.GenerativeModel(
+        MODEL_NAME, system_instruction=SYSTEM_INSTRUCTION, generation_config=generation_config
+    )
+    cache = SummaryCache(CACHE_FOLDER)
+
+    pdf_q = asyncio.Queue()
+    generate_q = asyncio.Queue(maxsize=UPLOAD_WORKERS)
+    render_q = asyncio.Queue(maxsize=MAX_CONCURRENCY)
+    for pdf_entry in pdf_files_found:
+        pdf_q.put_nowait(pdf_entry)
+    for _ in range(UPLOAD_WORKERS):
+        pdf_q.put_nowait(None)
+
+    async def upload_stage():
+        await asyncio.gather(
+            *(uploader(pdf_q, generate_q, render_q, cache) for _ in range(UPLOAD_WORKERS))
+        )
+        for _ in range(MAX_CONCURRENCY):
+            await generate_q.put(None)
 
-        except Exception as e:
-            print(f"An error occurred while processing '{book_title}': {e}")
-            import traceback
+    async def generate_stage():
+        await asyncio.gather(*(generator(generate_q, render_q, model, cache) for _ in range(MAX_CONCURRENCY)))
+        await render_q.put(None)
 
-            traceback.print_exc()  # Print full traceback for better debugging
+    # Every worker has at most one blocking call (Files API or PDF build) in a thread at a time,
+    # so a pool with one thread per worker never queues them and never oversubscribes the quota
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS + MAX_CONCURRENCY + 1, thread_name_prefix="gemini") as executor:
+        asyncio.get_running_loop().set_default_executor(executor)
+        try:
+            await asyncio.gather(upload_stage(), generate_stage(), renderer(render_q))
         finally:
-            # Clean up: Delete the uploaded file from Gemini's service
-            if uploaded_file_obj and hasattr(uploaded_file_obj, "name"):
-                try:
-                    genai.delete_file(uploaded_file_obj.name)
-                    print(f"Deleted temporary Gemini file '{uploaded_file_obj.name}' for '{book_title}'.")
-                except Exception as e:
-                    print(f"Error deleting temporary Gemini file '{uploaded_file_obj.name}': {e}")
-            else:
-                print(
-                    f"No Gemini file to delete for '{book_title}' (upload might have failed or object missing 'name')."
-                )
+            # Let the last background deletions finish before the executor shuts down, then sweep up
+            # files whose deletion failed or that an interrupted run never got to
+            await asyncio.gather(*_cleanup_tasks)
+            await sweep_uploaded_files()
 
 
 # --- Run the script ---
 if __name__ == "__main__":
     print(f"Python {sys.version} on {sys.platform}")
     print(f"Current working directory: {os.getcwd()}")
-    process_ebooks_with_gemini_vision()
+    asyncio.run(process_ebooks_with_gemini_vision())
     print("\n--- Processing Complete ---")
@@ -0,0 +1,72 @@
+"""Shared OpenAI client construction for the summariser scripts."""
+
+import os
+
+import httpx
+import openai
+from aiolimiter import AsyncLimiter
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Upper bound on simultaneous HTTP connections held by one client
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32  # Idle connections kept warm so later calls skip the TCP/TLS handshake
+# Client-side request budget, kept under the account's RPM quota so we rarely see a 429 at all
+REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+MAX_ATTEMPTS = 6
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+# A dropped connection can hide a create call the server already carried out, so creates that leave a
+# billed or stored object behind are only retried when the server has plainly refused the request
+REJECTED_ERRORS = (openai.RateLimitError, openai.InternalServerError)
+
+_rate_limiter = AsyncLimiter(REQUESTS_PER_MINUTE, 60)
+_backoff = wait_random_exponential(min=1, max=60)
+
+
+async def _throttle(request: httpx.Request):
+    await _rate_limiter.acquire()
+
+
+def _wait_for_retry(retry_state) -> float:
+    # Prefer the server's Retry-After hint over our own jittered backoff
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+# Decorator for coroutines that call the API: retries 429s, 5xx and dropped connections with jitter
+retry_api_call = retry(
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    reraise=True,
+)
+
+# Decorator for calls that create runs or files: retries 429s and 5xx but not dropped connections
+retry_create_call = retry(
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    retry=retry_if_exception_type(REJECTED_ERRORS),
+    reraise=True,
+)
+
+
+def create_async_client() -> AsyncOpenAI:
+    """Create one AsyncOpenAI client to be shared by every request in a run.
+
+    The API key is read from the OPENAI_API_KEY environment variable, so callers
+    should run load_dotenv() first. Every request waits on a shared rate limiter;
+    the SDK's own retries are disabled because callers retry with retry_api_call.
+    """
+    # HTTP/2 multiplexes concurrent requests over a few connections instead of one per request
+    http_client = DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+        event_hooks={"request": [_throttle]},
+    )
+    return AsyncOpenAI(http_client=http_client, max_retries=0)
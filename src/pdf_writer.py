@@ -0,0 +1,14 @@
+"""Plain-text PDF output shared by the ChatGPT summariser scripts."""
+
+from fpdf import FPDF
+
+
+def save_as_pdf(text, output_path):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    text = text.encode("ascii", "ignore").decode("ascii")  # Strip emojis
+
+    # multi_cell wraps the text and honours its newlines, so one call lays out the whole summary
+    pdf.multi_cell(0, 10, text)
+    pdf.output(output_path)
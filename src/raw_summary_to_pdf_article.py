@@ -5,20 +5,52 @@
 # input file for titles, headings, paragraphs, and quotes.
 # This version features slightly smaller section headings for a more refined look.
 #
+# With --bold-prefixes it also lays out bullet points, and sets a leading
+# **Bold Text** in paragraphs and bullet points in bold. In that mode the
+# first '##' heading is a section rather than the subtitle.
+#
 # To run this script, you first need to install the library:
 # pip install fpdf2
 
+import re
+import argparse
+import multiprocessing
+from functools import lru_cache
+
 from fpdf import FPDF
 
 # --- Configuration for Magazine Style ---
-# Define a color palette for a professional look
-COLOR_PALETTE = {
-    "dark_blue": (22, 46, 81),
-    "text_dark": (34, 34, 34),
-    "text_light": (85, 85, 85),
-    "line_grey": (220, 220, 220),
-    "quote_grey": (240, 240, 240),
-}
+# Define a color palette for a professional look; plain RGB constants, so no dict lookup per call
+DARK_BLUE = (22, 46, 81)
+TEXT_DARK = (34, 34, 34)
+TEXT_LIGHT = (85, 85, 85)
+LINE_GREY = (220, 220, 220)
+QUOTE_GREY = (240, 240, 240)
+
+# Typographic characters the core PDF fonts lack, mapped to plain equivalents; applied in one pass
+_UNICODE_TRANS = str.maketrans(
+    {
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2014": "--",
+        "\u2026": "...",
+    }
+)
+
+# Matches **Bold Text** followed by more text at the start of a paragraph or bullet point
+_BOLD_PREFIX_RE = re.compile(r"\*\*(.*?)\*\*(.*)")
+
+# Line prefix -> (content type, prefix length), longest prefix first; '## Introduction' headers are
+# special-cased unless bold prefixes are on
+_PREFIX_TABLE = (
+    ("### ", "subheader", 4),
+    ("## ", "header", 3),
+    ("> ", "quote", 2),
+)
+# The --bold-prefixes layout also recognises bullet points
+_BOLD_PREFIX_TABLE = _PREFIX_TABLE + (("* ", "bullet", 2),)
 
 
 class PDF(FPDF):
@@ -32,6 +64,41 @@ class PDF(FPDF):
         super().__init__(*args, **kwargs)
         self.article_title = ""
         self.article_subtitle = ""
+        # The last set_font request and the font it selected
+        self._font_request = None
+        self._requested_font = None
+        # Colour attribute name -> (last requested colour, the colour object it produced)
+        self._color_requests = {}
+
+    def set_font(self, family=None, style="", size=0):
+        """Skips fpdf's font lookup when the same font is requested again and is still selected."""
+        if (
+            size
+            and (family, style, size) == self._font_request
+            and self.current_font is self._requested_font
+            and self.font_size_pt == size
+        ):
+            return
+        super().set_font(family, style, size)
+        self._font_request = (family, style, size)
+        self._requested_font = self.current_font
+
+    def _set_color_once(self, set_color, attr, rgb):
+        """Calls fpdf's colour setter unless rgb was the last colour it set and that colour is still current."""
+        last_request = self._color_requests.get(attr)
+        if last_request is not None and last_request[0] == rgb and getattr(self, attr) is last_request[1]:
+            return
+        set_color(*rgb)
+        self._color_requests[attr] = (rgb, getattr(self, attr))
+
+    def set_text_color(self, r, g=-1, b=-1):
+        self._set_color_once(super().set_text_color, "text_color", (r, g, b))
+
+    def set_draw_color(self, r, g=-1, b=-1):
+        self._set_color_once(super().set_draw_color, "draw_color", (r, g, b))
+
+    def set_fill_color(self, r, g=-1, b=-1):
+        self._set_color_once(super().set_fill_color, "fill_color", (r, g, b))
 
     def set_article_meta(self, title, subtitle):
         """Sets the title and subtitle for the header."""
@@ -45,7 +112,7 @@ class PDF(FPDF):
         """
         if self.page_no() == 1:
             # --- Magazine Title Banner ---
-            self.set_fill_color(*COLOR_PALETTE["dark_blue"])
+            self.set_fill_color(*DARK_BLUE)
             # Draw the banner rectangle
             self.rect(0, 0, self.w, 50, "F")
 
@@ -68,7 +135,7 @@ class PDF(FPDF):
         else:
             # Simple header for subsequent pages
             self.set_font("Helvetica", "I", 8)
-            self.set_text_color(*COLOR_PALETTE["text_light"])
+            self.set_text_color(*TEXT_LIGHT)
             self.cell(0, 10, self.article_title, 0, 0, "L")
             self.set_y(self.get_y() + 10)
 
@@ -76,13 +143,13 @@ class PDF(FPDF):
         """Standard footer with page number."""
         self.set_y(-15)
         self.set_font("Helvetica", "I", 8)
-        self.set_text_color(*COLOR_PALETTE["text_light"])
+        self.set_text_color(*TEXT_LIGHT)
         self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
 
     def draw_section_separator(self):
         """Draws a light grey line to separate sections."""
         self.ln(5)
-        self.set_draw_color(*COLOR_PALETTE["line_grey"])
+        self.set_draw_color(*LINE_GREY)
         self.cell(0, 0, "", "T", 1)
         self.ln(5)
 
@@ -90,58 +157,139 @@ class PDF(FPDF):
         """Formats and displays a section heading."""
         # UPDATED: Font size reduced from 16 to 14
         self.set_font("Helvetica", "B", 14)
-        self.set_text_color(*COLOR_PALETTE["dark_blue"])
+        self.set_text_color(*DARK_BLUE)
         self.multi_cell(0, 10, text, 0, "L")
         self.ln(2)
 
-    def show_paragraph(self, text):
-        """Formats and displays a standard paragraph."""
+    def _write_with_bold_prefix(self, text):
+        """Writes text, setting a leading **Bold Text** in bold and wrapping the rest after it."""
+        match = _BOLD_PREFIX_RE.match(text)
+        if match:
+            bold_part = match.group(1).strip()
+            regular_part = match.group(2).strip()
+
+            self.set_font("Times", "B", 12)
+            self.write(h=7, txt=bold_part + " ")
+
+            end_of_bold_x = self.get_x()
+            self.set_font("Times", "", 12)
+
+            # Use multi_cell for the rest of the text to handle wrapping
+            remaining_width = self.w - self.r_margin - end_of_bold_x
+            self.multi_cell(w=remaining_width, h=7, txt=regular_part, align="L")
+        else:
+            self.set_font("Times", "", 12)
+            self.multi_cell(0, 7, text, 0, "J")
+
+    def show_paragraph(self, text, handle_bold_prefix=False):
+        """Formats and displays a standard paragraph, optionally with a bold prefix."""
+        if handle_bold_prefix:
+            self.ln(2)
+            self.set_text_color(*TEXT_DARK)
+            self._write_with_bold_prefix(text)
+            self.ln(2)
+            return
+
         self.set_font("Times", "", 12)
-        self.set_text_color(*COLOR_PALETTE["text_dark"])
+        self.set_text_color(*TEXT_DARK)
         self.multi_cell(0, 7, text, 0, "J")  # Justified text
         self.ln(4)
 
+    def show_bullet_point(self, text):
+        """Formats and displays a bullet point, handling bold prefixes."""
+        self.ln(1)
+        self.set_text_color(*TEXT_DARK)
+
+        bullet_x = self.get_x()
+        bullet_char = chr(149)
+        text_x = bullet_x + 8
+
+        # Place the bullet, but preserve Y coordinate
+        current_y = self.get_y()
+        self.cell(w=8, h=7, txt=bullet_char, align="C")
+        self.set_y(current_y)  # Reset Y to the start of the line
+        self.set_x(text_x)
+
+        self._write_with_bold_prefix(text)
+        self.ln(1)
+
     def show_quote(self, text):
         """Formats and displays a quote in a styled block."""
         self.ln(2)
         quote_x = self.get_x()
         quote_y = self.get_y()
-        self.set_left_margin(self.l_margin + 5)  # Indent text
+        left_margin = self.l_margin
+        self.set_left_margin(left_margin + 5)  # Indent text
 
         # Draw background box for the quote
-        self.set_fill_color(*COLOR_PALETTE["quote_grey"])
-        # We need to calculate the height of the quote first
-        temp_pdf = self.__class__()  # Create temp instance to calculate height
-        temp_pdf.add_page()
-        temp_pdf.set_font("Times", "I", 11)
-        temp_pdf.set_left_margin(self.l_margin + 5)
-        temp_pdf.multi_cell(0, 6, text, 0, "L")
-        quote_height = temp_pdf.get_y() - temp_pdf.t_margin
+        self.set_fill_color(*QUOTE_GREY)
+        # We need to calculate the height of the quote first; a dry run lays it out without drawing
+        self.set_font("Times", "I", 11)
+        box_height = self.multi_cell(0, 6, text, 0, "L", dry_run=True, output="HEIGHT") + 4  # 2mm padding each side
 
         self.rect(
             quote_x,
             quote_y,
             self.w - self.l_margin - self.r_margin,
-            quote_height + 4,
+            box_height,
             "F",
         )
 
         # Draw vertical accent line
-        self.set_draw_color(*COLOR_PALETTE["dark_blue"])
+        self.set_draw_color(*DARK_BLUE)
         self.set_line_width(1)
-        self.line(quote_x, quote_y, quote_x, quote_y + quote_height + 4)
+        self.line(quote_x, quote_y, quote_x, quote_y + box_height)
 
         # Set quote text
         self.set_y(quote_y + 2)  # Add padding
-        self.set_font("Times", "I", 11)
-        self.set_text_color(*COLOR_PALETTE["text_light"])
-        self.multi_cell(0, 6, text, 0, "L")
+        self.set_text_color(*TEXT_LIGHT)
+        self.multi_cell(0, 6, text, 0, "L")  # Still in the italic font selected for the dry run
 
-        self.set_left_margin(self.l_margin)  # Reset margin
+        self.set_left_margin(left_margin)  # Reset margin
         self.ln(6)
 
 
-def parse_summary_file(filepath):
+def _content_lines(lines, article_data):
+    """
+    Reads the title and subtitle off the front of lines into article_data,
+    then yields the remaining lines stripped.
+    Without a subtitle there is no header block, so every line is content.
+    """
+    # Extract title and optional subtitle
+    title_found = False
+    header_lines = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("# ") and not title_found:
+            article_data["title"] = line[2:].strip()
+            title_found = True
+        elif line.startswith("## "):
+            article_data["subtitle"] = line[3:].strip()
+            break
+        header_lines.append(line)
+    else:
+        yield from header_lines
+        return
+
+    # Move to the remaining content
+    for line in lines:
+        yield line.strip()
+
+
+def _lines_without_title(lines, article_data):
+    """Reads the first '# ' line into article_data as the title and yields every other line stripped."""
+    for line in lines:
+        line = line.strip()
+        if line.startswith("# "):
+            article_data["title"] = line[2:].strip()
+            break
+        yield line
+
+    for line in lines:
+        yield line.strip()
+
+
+def parse_summary_file(filepath, bold_prefixes=False):
     """
     Parses a text file with simple markdown-like syntax.
     - Lines starting with '#' are the title.
@@ -150,87 +298,72 @@ def parse_summary_file(filepath):
     - An '## Introduction' is treated as part of the main section.
     - Lines starting with '>' are quotes.
     - Other non-empty lines are paragraphs.
+    With bold_prefixes, lines starting with '*' are bullet points, and the
+    subtitle and 'Introduction' rules are skipped.
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
     article_data = {"title": "Untitled Article", "subtitle": "", "content": []}
+    content = article_data["content"]
+    if bold_prefixes:
+        read_lines, prefix_table = _lines_without_title, _BOLD_PREFIX_TABLE
+    else:
+        read_lines, prefix_table = _content_lines, _PREFIX_TABLE
 
-    # Extract title and optional subtitle
-    title_found = False
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if line.startswith("# ") and not title_found:
-            article_data["title"] = line.lstrip("# ").strip()
-            title_found = True
-        elif line.startswith("## ") and not article_data["subtitle"]:
-            article_data["subtitle"] = line.lstrip("## ").strip()
-            lines = lines[i + 1:]  # Move to the remaining content
-            break
-
-    # Parse the content line by line
+    # Parse the content line by line, streamed off the file in 64 KiB reads
     paragraph_buffer = []
     current_section = None
-    for line in lines:
-        line = line.strip()
-        if not line:  # Empty line = end of paragraph
-            if paragraph_buffer:
-                article_data["content"].append(("paragraph", " ".join(paragraph_buffer)))
-                paragraph_buffer = []
-            continue
-
-        if line.startswith("## "):  # Main header logic
-            if paragraph_buffer:
-                article_data["content"].append(("paragraph", " ".join(paragraph_buffer)))
-                paragraph_buffer = []
-
-            if "Introduction" in line:  # Handle 'Introduction' as subsection
-                if current_section:  # Include Introduction under the current section
-                    article_data["content"].append(("subheader", line.lstrip("## ").strip()))
-            else:  # Treat as a regular main section header
-                current_section = line.lstrip("## ").strip()
-                article_data["content"].append(("header", current_section))
-        elif line.startswith("### "):  # Subsection headers
-            if paragraph_buffer:
-                article_data["content"].append(("paragraph", " ".join(paragraph_buffer)))
-                paragraph_buffer = []
-            article_data["content"].append(("subheader", line.lstrip("### ").strip()))
-        elif line.startswith("> "):  # Block quotes
-            if paragraph_buffer:
-                article_data["content"].append(("paragraph", " ".join(paragraph_buffer)))
-                paragraph_buffer = []
-            article_data["content"].append(("quote", line.lstrip("> ").strip()))
-        else:  # Regular paragraph
-            paragraph_buffer.append(line)
 
-    # Add any remaining paragraph
-    if paragraph_buffer:
-        article_data["content"].append(("paragraph", " ".join(paragraph_buffer)))
+    def flush_paragraph():
+        if paragraph_buffer:
+            content.append(("paragraph", " ".join(paragraph_buffer)))
+            paragraph_buffer.clear()
+
+    with open(filepath, "r", encoding="utf-8", buffering=1 << 16) as f:
+        for line in read_lines(f, article_data):
+            if not line:  # Empty line = end of paragraph
+                flush_paragraph()
+                continue
+
+            for prefix, content_type, prefix_len in prefix_table:
+                if line.startswith(prefix):
+                    flush_paragraph()
+                    text = line[prefix_len:].strip()
+                    if content_type == "header" and not bold_prefixes:  # Main header logic
+                        if "Introduction" in text:  # Handle 'Introduction' as subsection
+                            if current_section:  # Include Introduction under the current section
+                                content.append(("subheader", text))
+                            break
+                        current_section = text  # Treat as a regular main section header
+                    content.append((content_type, text))
+                    break
+            else:  # Regular paragraph
+                paragraph_buffer.append(line)
 
+    # Add any remaining paragraph
+    flush_paragraph()
     return article_data
 
 
-def create_article_pdf(article_data, filename="magazine_article.pdf"):
+# Headings, bold prefixes and boilerplate lines repeat across an article, so repeats are a dict lookup
+@lru_cache(maxsize=8192)
+def sanitize_text(text):
+    """Utility to replace unsupported characters."""
+    if text.isascii():  # Most summary text; nothing to replace
+        return text
+    text = text.translate(_UNICODE_TRANS)
+    try:
+        text.encode("latin-1")
+        return text
+    except UnicodeEncodeError:
+        return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def create_article_pdf(article_data, filename="magazine_article.pdf", bold_prefixes=False):
     """
     Generates the PDF file from the parsed article data.
+    Pass the same bold_prefixes that parse_summary_file was given.
     """
-
-    def sanitize_text(text):
-        """Utility to replace unsupported characters."""
-        unicode_map = {
-            "\u2018": "'",
-            "\u2019": "'",
-            "\u201c": '"',
-            "\u201d": '"',
-            "\u2014": "--",
-            "\u2026": "...",
-        }
-        for unicode_char, ascii_char in unicode_map.items():
-            text = text.replace(unicode_char, ascii_char)
-        return text.encode("latin-1", "replace").decode("latin-1")
-
     pdf = PDF("P", "mm", "A4")
-    pdf.set_article_meta(article_data["title"], article_data["subtitle"])
+    pdf.set_article_meta(sanitize_text(article_data["title"]), sanitize_text(article_data["subtitle"]))
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=20)
     pdf.set_left_margin(15)
@@ -245,12 +378,16 @@ def create_article_pdf(article_data, filename="magazine_article.pdf"):
             pdf.show_heading(sanitized_text)
             first_heading = False
         elif content_type == "subheader":  # Subsections (including 'Introduction')
+            if bold_prefixes:
+                pdf.ln(4)
             pdf.set_font("Helvetica", "B", 12)
-            pdf.set_text_color(*COLOR_PALETTE["text_dark"])
+            pdf.set_text_color(*TEXT_DARK)
             pdf.multi_cell(0, 7, sanitized_text, 0, "L")  # Slightly smaller font for subsections
             pdf.ln(2)
         elif content_type == "paragraph":  # Regular paragraph
-            pdf.show_paragraph(sanitized_text)
+            pdf.show_paragraph(sanitized_text, handle_bold_prefix=bold_prefixes)
+        elif content_type == "bullet":  # Bullet points (--bold-prefixes only)
+            pdf.show_bullet_point(sanitized_text)
         elif content_type == "quote":  # Block quotes
             pdf.show_quote(sanitized_text)
 
@@ -261,25 +398,47 @@ def create_article_pdf(article_data, filename="magazine_article.pdf"):
         print(f"An error occurred while creating the PDF: {e}")
 
 
-if __name__ == "__main__":
-    # Get a list of files in the raw_summaries directory
-    import os
+def convert_summary_file(input_file, output_file, bold_prefixes=False):
+    """
+    Parses one raw summary file and generates its PDF.
+    Top level so it can be sent to a worker process.
+    """
+    # Parse the summary file into a structured format
+    parsed_data = parse_summary_file(input_file, bold_prefixes)
 
-    raw_summaries_dir = "raw_summaries"
+    # Generate the beautiful PDF from the parsed data
+    create_article_pdf(parsed_data, filename=output_file, bold_prefixes=bold_prefixes)
 
-    for filename in os.listdir(raw_summaries_dir):
-        if filename.endswith(".txt"):
-            # Get the input file path
-            input_file = os.path.join(raw_summaries_dir, filename)
 
-            # Generate output PDF filename by replacing .txt extension
-            output_filename = os.path.splitext(filename)[0] + ".pdf"
+if __name__ == "__main__":
+    import os
 
-            # Parse the summary file into a structured format
-            parsed_data = parse_summary_file(input_file)
+    arg_parser = argparse.ArgumentParser(description="Convert raw summaries into magazine-style PDF articles.")
+    arg_parser.add_argument(
+        "--bold-prefixes",
+        action="store_true",
+        help="Lay out bullet points and bold **lead-ins**; the first '##' heading is not used as the subtitle",
+    )
+    args = arg_parser.parse_args()
 
-            # Generate the beautiful PDF from the parsed data
-            create_article_pdf(
-                parsed_data,
-                filename=os.path.join("gemini_pdf_summaries", output_filename),
-            )
+    # Get a list of files in the raw_summaries directory
+    raw_summaries_dir = "raw_summaries"
+    if not os.path.exists(raw_summaries_dir):
+        print(f"Error: Directory '{raw_summaries_dir}' not found.")
+        exit()
+
+    summaries_dir = "gemini_pdf_summaries"
+    if not os.path.exists(summaries_dir):
+        os.makedirs(summaries_dir)
+
+    # Pair each input file's path with its output PDF, replacing the .txt extension
+    with os.scandir(raw_summaries_dir) as it:
+        tasks = [
+            (entry.path, os.path.join(summaries_dir, entry.name[:-4] + ".pdf"), args.bold_prefixes)
+            for entry in it
+            if entry.is_file() and entry.name.endswith(".txt")
+        ]
+
+    # Every file is parsed and laid out independently, so they are spread over one process per core
+    with multiprocessing.Pool() as pool:
+        pool.starmap(convert_summary_file, tasks, chunksize=1)
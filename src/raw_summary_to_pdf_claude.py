@@ -6,17 +6,21 @@ This script converts markdown-formatted eBook gemini_pdf_summaries into attracti
 It handles headings, bullet points, bold text, quotes, and creates a professional layout.
 
 Required packages:
-pip install reportlab markdown beautifulsoup4 lxml
+pip install reportlab
 
 Usage:
 python ebook_to_pdf.py input_file.txt output_file.pdf
 """
 
 import re
+import json
+import os
 import argparse
+import multiprocessing
 from pathlib import Path
+from functools import lru_cache
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -24,8 +28,18 @@ from reportlab.lib.colors import HexColor
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 
-import markdown
-from bs4 import BeautifulSoup
+# Bump whenever the styles or layout change so PDFs built by older code are rebuilt
+PDF_STYLE_VERSION = "claude-2"
+# Records, per summary, the input and output file state its PDF was last built from
+PDF_MANIFEST = ".pdf_manifest.json"
+
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+_TITLE_RE = re.compile(r"# BOOK SUMMARY: (.+)")
+TITLE_SCAN_LINES = 20  # The title heading is always near the top, so the rest of the file is not searched
+
+
+def _today() -> str:
+    return datetime.now().strftime("%B %d, %Y")
 
 
 class EBookSummaryParser:
@@ -35,8 +49,10 @@ class EBookSummaryParser:
         self.styles = self._create_styles()
         self.story = []
 
-    def _create_styles(self) -> Dict[str, ParagraphStyle]:
-        """Create custom paragraph styles for the PDF."""
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _create_styles() -> Dict[str, ParagraphStyle]:
+        """Create custom paragraph styles for the PDF, once per process; ReportLab styles are reusable."""
         styles = getSampleStyleSheet()
 
         custom_styles = {
@@ -139,33 +155,22 @@ class EBookSummaryParser:
 
         return custom_styles
 
-    def parse_markdown_text(self, text: str) -> str:
-        """Convert markdown text to HTML, handling custom formatting."""
-        # Convert markdown to HTML
-        html = markdown.markdown(text, extensions=["extra", "codehilite"])
-
-        # Parse with BeautifulSoup for easier manipulation
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Convert back to string
-        return str(soup)
-
     def extract_title(self, text: str) -> str:
         """Extract the main title from the text."""
-        lines = text.split("\n")
+        lines = text.split("\n", TITLE_SCAN_LINES)[:TITLE_SCAN_LINES]
         for line in lines:
             line = line.strip()
             if line.startswith("# ") and "BOOK SUMMARY" in line:
                 # Extract book title and author
-                title_match = re.search(r"# BOOK SUMMARY: (.+)", line)
+                title_match = _TITLE_RE.match(line)
                 if title_match:
                     return title_match.group(1)
             elif line.startswith("# ") and line != "# BOOK SUMMARY":
                 return line[2:].strip()
         return "eBook Summary"
 
-    def process_content(self, text: str) -> List[Any]:
-        """Process the text content and return story elements."""
+    def process_content(self, text: str, date_str: Optional[str] = None) -> List[Any]:
+        """Process the text content and return story elements, dated date_str (default today)."""
         story = []
 
         # Extract title
@@ -174,25 +179,37 @@ class EBookSummaryParser:
         story.append(Spacer(1, 20))
 
         # Add generation date
-        date_str = f"Generated on {datetime.now().strftime('%B %d, %Y')}"
-        story.append(Paragraph(date_str, self.styles["Body"]))
+        date_str = date_str or _today()
+        story.append(Paragraph(f"Generated on {date_str}", self.styles["Body"]))
         story.append(Spacer(1, 30))
 
+        # Look styles up once here rather than on every line of the loop
+        body_style = self.styles["Body"]
+        bullet_style = self.styles["Bullet"]
+        quote_style = self.styles["Quote"]
+        heading_styles = {1: self.styles["Heading1"], 2: self.styles["Heading2"], 3: self.styles["Heading3"]}
+        process_bold_text = self._process_bold_text
+        append = story.append
+
         # Process content line by line
         lines = text.split("\n")
         in_bullet_list = False
         current_paragraph = []
 
+        def flush_paragraph() -> bool:
+            if not current_paragraph:
+                return False
+            append(Paragraph(" ".join(current_paragraph), body_style))
+            current_paragraph.clear()
+            return True
+
         for line in lines:
             line = line.strip()
 
             if not line:
                 # Empty line - end current paragraph if any
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
-                    story.append(Spacer(1, 6))
+                if flush_paragraph():
+                    append(Spacer(1, 6))
                 in_bullet_list = False
                 continue
 
@@ -200,104 +217,77 @@ class EBookSummaryParser:
             if line.startswith("# BOOK SUMMARY"):
                 continue
 
-            # Headers
-            if line.startswith("###"):
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
-
-                header_text = line[3:].strip()
-                story.append(Paragraph(header_text, self.styles["Heading3"]))
-                in_bullet_list = False
-
-            elif line.startswith("##"):
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
-
-                header_text = line[2:].strip()
-                story.append(Paragraph(header_text, self.styles["Heading2"]))
-                in_bullet_list = False
-
-            elif line.startswith("#"):
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
+            # Classify the line once on its first character
+            marker = line[0]
 
-                header_text = line[1:].strip()
-                story.append(Paragraph(header_text, self.styles["Heading1"]))
+            # Headers
+            if marker == "#":
+                flush_paragraph()
+                level = 3 if line.startswith("###") else 2 if line.startswith("##") else 1
+                header_text = line[level:].strip()
+                append(Paragraph(header_text, heading_styles[level]))
                 in_bullet_list = False
 
             # Bullet points
-            elif line.startswith("*") or line.startswith("-"):
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
-
+            elif marker in "*-":
+                flush_paragraph()
                 bullet_text = line[1:].strip()
                 # Process bold text in bullets
-                bullet_text = self._process_bold_text(bullet_text)
-                story.append(Paragraph(f"• {bullet_text}", self.styles["Bullet"]))
+                bullet_text = process_bold_text(bullet_text)
+                # The style's bulletIndent places the bullet and gives wrapped lines a hanging indent
+                append(Paragraph(bullet_text, bullet_style, bulletText="•"))
                 in_bullet_list = True
 
             # Block quotes
-            elif line.startswith(">"):
-                if current_paragraph:
-                    paragraph_text = " ".join(current_paragraph)
-                    story.append(Paragraph(paragraph_text, self.styles["Body"]))
-                    current_paragraph = []
-
+            elif marker == ">":
+                flush_paragraph()
                 quote_text = line[1:].strip()
                 # Remove extra quotes if present
                 if quote_text.startswith('"') and quote_text.endswith('"'):
                     quote_text = quote_text[1:-1]
-                story.append(Paragraph(f'"{quote_text}"', self.styles["Quote"]))
+                append(Paragraph(f'"{quote_text}"', quote_style))
                 in_bullet_list = False
 
             # Regular text
             else:
                 if in_bullet_list:
                     # Add some space after bullet lists
-                    story.append(Spacer(1, 6))
+                    append(Spacer(1, 6))
                     in_bullet_list = False
 
                 # Process bold text
-                line = self._process_bold_text(line)
+                line = process_bold_text(line)
                 current_paragraph.append(line)
 
         # Add any remaining paragraph
-        if current_paragraph:
-            paragraph_text = " ".join(current_paragraph)
-            story.append(Paragraph(paragraph_text, self.styles["Body"]))
+        flush_paragraph()
 
         return story
 
     def _process_bold_text(self, text: str) -> str:
         """Convert **bold** markdown to ReportLab bold formatting."""
+        # Most lines have no bold at all, so skip the regex engine for them
+        if "**" not in text:
+            return text
         # Replace **text** with <b>text</b>
-        text = re.sub(r"\*\*(.*?)\*\*", r"<b>\1</b>", text)
-        return text
+        return _BOLD_RE.sub(r"<b>\1</b>", text)
 
-    def create_pdf(self, input_file: str, output_file: str):
-        """Create PDF from input text file."""
+    def create_pdf(self, input_file: str, output_file: str, date_str: Optional[str] = None) -> bool:
+        """Create PDF from input text file, dated date_str (default today). Returns True on success."""
         # Read input file
         try:
-            with open(input_file, "r", encoding="utf-8") as f:
-                content = f.read()
+            # One read of the whole file; summaries are small enough to hold in memory
+            content = Path(input_file).read_text(encoding="utf-8")
         except FileNotFoundError:
             print(f"Error: File '{input_file}' not found.")
-            return
+            return False
         except Exception as e:
             print(f"Error reading file: {e}")
-            return
+            return False
 
         # Create PDF document
         doc = SimpleDocTemplate(
-            output_file,
+            str(output_file),  # ReportLab rejects a Path, which main() passes when it derives the name
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
@@ -306,14 +296,35 @@ class EBookSummaryParser:
         )
 
         # Process content
-        story = self.process_content(content)
+        story = self.process_content(content, date_str)
 
         # Build PDF
         try:
             doc.build(story)
             print(f"PDF successfully created: {output_file}")
+            return True
         except Exception as e:
             print(f"Error creating PDF: {e}")
+            return False
+
+
+def _convert_one(input_file: str, output_file: str, date_str: str) -> bool:
+    """Convert a single summary to PDF; module-level so process_folder's worker processes can run it."""
+    print(f"\nProcessing: {Path(input_file).name}")
+    try:
+        # Each worker builds its own parser rather than sharing ReportLab styles across processes
+        if EBookSummaryParser().create_pdf(input_file, output_file, date_str):
+            print(f"✓ Created: {output_file}")
+            return True
+    except Exception as e:
+        print(f"✗ Error processing {Path(input_file).name}: {e}")
+    return False
+
+
+def _build_state(input_file: Path, output_file: Path) -> list:
+    """Size and mtime of a summary, mtime of its PDF, and the layout version, as stored in the manifest."""
+    input_stat = input_file.stat()
+    return [input_stat.st_size, input_stat.st_mtime_ns, output_file.stat().st_mtime_ns, PDF_STYLE_VERSION]
 
 
 def process_folder(input_folder: str = "raw_summaries", output_folder: str = "claude_pdf_summaries"):
@@ -341,25 +352,42 @@ def process_folder(input_folder: str = "raw_summaries", output_folder: str = "cl
 
     print(f"Found {len(text_files)} text file(s) to process:")
 
-    # Create parser instance
-    parser = EBookSummaryParser()
+    # Every PDF in the batch carries the same date, worked out once here
+    date_str = _today()
 
-    # Process each file
-    for text_file in text_files:
-        print(f"\nProcessing: {text_file.name}")
+    manifest_file = output_path / PDF_MANIFEST
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        manifest = {}
 
-        # Create output filename (remove _raw suffix if present and add .pdf extension)
+    # Pair each input with its output filename (remove _raw suffix if present and add .pdf extension)
+    tasks = []
+    for text_file in text_files:
         stem = text_file.stem
         if stem.endswith("_raw"):
             stem = stem[:-4]  # Remove the _raw suffix
         output_file = output_path / f"{stem}.pdf"
 
-        try:
-            # Convert to PDF
-            parser.create_pdf(str(text_file), str(output_file))
-            print(f"✓ Created: {output_file}")
-        except Exception as e:
-            print(f"✗ Error processing {text_file.name}: {e}")
+        # Leave a PDF alone if neither it nor its summary has changed since it was built
+        if output_file.exists() and manifest.get(text_file.name) == _build_state(text_file, output_file):
+            print(f"Skipping unchanged: {text_file.name}")
+            continue
+        tasks.append((str(text_file), str(output_file), date_str))
+
+    if not tasks:
+        print("\nAll PDFs are up to date.")
+        return
+
+    # Each file is parsed and built independently, so spread them across CPU cores
+    processes = os.cpu_count() or 1
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(_convert_one, tasks, chunksize=max(1, len(tasks) // (4 * processes)))
+
+    for (input_file, output_file, _), created in zip(tasks, results):
+        if created:
+            manifest[Path(input_file).name] = _build_state(Path(input_file), Path(output_file))
+    manifest_file.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
 
     print(f"\nProcessing complete! PDFs saved to '{output_folder}' folder.")
 
@@ -0,0 +1,98 @@
+"""Content-addressed on-disk cache of generated summaries, shared by the summariser scripts."""
+
+import os
+import json
+import math
+import mmap
+import shutil
+import hashlib
+from typing import List, Optional
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of a file's bytes."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()  # mmap refuses empty files
+        # Hashing the mapped pages in one call avoids copying the file through read buffers
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    """Return the hex SHA-256 digest of a string's UTF-8 encoding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(content_digest: str, *parts: str) -> str:
+    """Combine a content digest with the model/prompt identifiers into one filename-safe key."""
+    return hashlib.sha256("\0".join((content_digest, *parts)).encode("utf-8")).hexdigest()
+
+
+def write_atomically(path: str, text: str):
+    """Write text via a temp file and os.replace so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SummaryCache:
+    """Stores one summary per key as a text file, plus an optional embedding index for near-duplicates."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._index = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached summary for key, or None on a miss."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, summary: str, embedding: Optional[List[float]] = None, scope: str = ""):
+        """Cache a summary; with an embedding it also becomes a candidate for find_similar."""
+        write_atomically(self._path(key), summary)
+        if embedding is not None:
+            index = self._load_index()
+            index.append({"key": key, "scope": scope, "embedding": embedding})
+            write_atomically(self.index_path, json.dumps(index))
+
+    def put_file(self, key: str, source_path: str):
+        """Cache a summary that was streamed to a file, without reading it into memory."""
+        tmp_path = f"{self._path(key)}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, self._path(key))
+
+    def find_similar(self, embedding: List[float], threshold: float, scope: str = "") -> Optional[str]:
+        """Return the cached summary whose embedding is most similar, if it clears the threshold."""
+        best_key, best_score = None, threshold
+        for entry in self._load_index():
+            if entry["scope"] != scope:
+                continue
+            score = _cosine_similarity(embedding, entry["embedding"])
+            if score > best_score:
+                best_key, best_score = entry["key"], score
+        return self.get(best_key) if best_key else None
+
+    def _load_index(self) -> list:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = []
+        return self._index
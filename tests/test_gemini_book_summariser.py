@@ -0,0 +1,64 @@
+from reportlab.platypus import PageBreak, Paragraph
+
+from gemini_book_summariser import SummaryStoryBuilder
+
+GOLDEN_SUMMARY = """# Part One
+## The **Big** Idea
+### Minor & more
+#### Smallest *heading*
+* **Key:** first point
+   * indented point
+- dash point
+> A quote
+Plain **bold** text
+
+# 4. Final Review and Recommendation
+I recommend it.
+"""
+
+
+def _paragraphs(story_builder):
+    """(style name, markup, bullet) for each paragraph; page breaks show as "page break"."""
+    return [
+        (flowable.style.name, flowable.text, flowable.bulletText) if isinstance(flowable, Paragraph) else "page break"
+        for flowable in story_builder.body
+        if isinstance(flowable, (Paragraph, PageBreak))
+    ]
+
+
+GOLDEN_PARAGRAPHS = [
+    ("h2", "The <b>Big</b> Idea", None),
+    ("h3", "Minor &amp; more", None),
+    ("h4", "Smallest <i>heading</i>", None),
+    ("Bullet", "<b>Key:</b> first point", "•"),
+    # Only an unindented marker starts a bullet
+    ("Normal", "* indented point", None),
+    ("Bullet", "dash point", "•"),
+    ("Quote", '"A quote"', None),
+    ("Normal", "Plain <b>bold</b> text", None),
+    "page break",
+    ("toc_title", "FINAL ASSESSMENT", None),
+    ("Callout", "I recommend it.", None),
+]
+
+
+def test_add_text():
+    story_builder = SummaryStoryBuilder()
+    story_builder.add_text(GOLDEN_SUMMARY)
+    assert story_builder.sections == ["Part One", "4. Final Review and Recommendation"]
+    assert _paragraphs(story_builder) == GOLDEN_PARAGRAPHS
+
+
+def test_streamed_feed_matches_add_text():
+    story_builder = SummaryStoryBuilder()
+    # Chunk boundaries fall mid-line and mid-marker, as they do in a streamed response
+    for start in range(0, len(GOLDEN_SUMMARY), 7):
+        story_builder.feed(GOLDEN_SUMMARY[start:start + 7])
+    story_builder.close()
+    assert _paragraphs(story_builder) == GOLDEN_PARAGRAPHS
+
+
+def test_malformed_markup_keeps_the_line():
+    story_builder = SummaryStoryBuilder()
+    story_builder.add_line("Unclosed <b>tag")
+    assert _paragraphs(story_builder) == [("Normal", "Unclosed &lt;b&gt;tag", None)]
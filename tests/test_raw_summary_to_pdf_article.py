@@ -0,0 +1,82 @@
+from fpdf import FPDF
+
+from raw_summary_to_pdf_article import create_article_pdf, parse_summary_file, sanitize_text
+
+GOLDEN_ARTICLE = """# The Title
+## A Subtitle
+
+## Introduction
+Intro **Lead:** text
+continues here
+
+## Section One
+### Sub A
+> A quote
+* **Bold:** bullet one
+   * indented bullet
+Plain “smart” — text… €5 café
+"""
+
+
+def _parse(tmp_path, bold_prefixes=False):
+    path = tmp_path / "article.txt"
+    path.write_text(GOLDEN_ARTICLE, encoding="utf-8")
+    return parse_summary_file(path, bold_prefixes=bold_prefixes)
+
+
+def test_parse_default_layout(tmp_path):
+    # A leading 'Introduction' with no section before it is dropped, and '* ' lines are plain text
+    assert _parse(tmp_path) == {
+        "title": "The Title",
+        "subtitle": "A Subtitle",
+        "content": [
+            ("paragraph", "Intro **Lead:** text continues here"),
+            ("header", "Section One"),
+            ("subheader", "Sub A"),
+            ("quote", "A quote"),
+            (
+                "paragraph",
+                "* **Bold:** bullet one * indented bullet Plain “smart” — text… €5 café",
+            ),
+        ],
+    }
+
+
+def test_parse_bold_prefix_layout(tmp_path):
+    # Only the title is read off the front; bullets keep their **Bold** lead-in, indented or not
+    assert _parse(tmp_path, bold_prefixes=True) == {
+        "title": "The Title",
+        "subtitle": "",
+        "content": [
+            ("header", "A Subtitle"),
+            ("header", "Introduction"),
+            ("paragraph", "Intro **Lead:** text continues here"),
+            ("header", "Section One"),
+            ("subheader", "Sub A"),
+            ("quote", "A quote"),
+            ("bullet", "**Bold:** bullet one"),
+            ("bullet", "indented bullet"),
+            ("paragraph", "Plain “smart” — text… €5 café"),
+        ],
+    }
+
+
+def test_sanitize_text_maps_typography_and_replaces_non_latin_1():
+    assert sanitize_text("Plain ascii") == "Plain ascii"
+    assert sanitize_text("‘a’ “b” — c…") == "'a' \"b\" -- c..."
+    # Latin-1 letters survive; anything else the core fonts cannot draw, such as the euro sign, becomes '?'
+    assert sanitize_text("€5 café – •") == "?5 café ? ?"
+
+
+def test_sanitized_text_renders_in_core_fonts():
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", "", 12)
+    pdf.multi_cell(0, 7, sanitize_text(GOLDEN_ARTICLE))
+
+
+def test_create_article_pdf_with_non_latin_1_text(tmp_path):
+    for bold_prefixes in (False, True):
+        output = tmp_path / f"article_{bold_prefixes}.pdf"
+        create_article_pdf(_parse(tmp_path, bold_prefixes), str(output), bold_prefixes=bold_prefixes)
+        assert output.read_bytes().startswith(b"%PDF")
@@ -0,0 +1,60 @@
+from reportlab.platypus import Paragraph, Spacer
+
+from raw_summary_to_pdf_claude import EBookSummaryParser
+from raw_summary_to_pdf_claude_high_contrast import EBookSummaryParser as HighContrastParser
+
+GOLDEN_SUMMARY = """# BOOK SUMMARY: Deep Work by Cal Newport
+
+## Part One
+### Rule 1
+Some **bold** text
+continued line
+* **Key:** first
+   * indented
+- dash
+> "Quoted words"
+after list
+"""
+
+
+def _outline(story):
+    """(style name, markup, bullet) for each paragraph, "spacer" for each spacer."""
+    return [
+        (flowable.style.name, flowable.text, flowable.bulletText) if isinstance(flowable, Paragraph) else "spacer"
+        for flowable in story
+        if isinstance(flowable, (Paragraph, Spacer))
+    ]
+
+
+def test_process_content():
+    story = EBookSummaryParser().process_content(GOLDEN_SUMMARY, date_str="1 January 2026")
+    assert _outline(story) == [
+        ("CustomTitle", "Deep Work by Cal Newport", None),
+        "spacer",
+        ("CustomBody", "Generated on 1 January 2026", None),
+        "spacer",
+        ("CustomHeading2", "Part One", None),
+        ("CustomHeading3", "Rule 1", None),
+        ("CustomBody", "Some <b>bold</b> text continued line", None),
+        ("CustomBullet", "<b>Key:</b> first", "•"),
+        ("CustomBullet", "indented", "•"),
+        ("CustomBullet", "dash", "•"),
+        ("CustomQuote", '"Quoted words"', None),
+        ("CustomBody", "after list", None),
+        "spacer",
+    ]
+
+
+def test_high_contrast_parses_the_same_structure():
+    standard = EBookSummaryParser().process_content(GOLDEN_SUMMARY, date_str="1 January 2026")
+    high_contrast = HighContrastParser().process_content(GOLDEN_SUMMARY, date_str="1 January 2026")
+    assert [entry if entry == "spacer" else entry[1:] for entry in _outline(high_contrast)] == [
+        entry if entry == "spacer" else entry[1:] for entry in _outline(standard)
+    ]
+
+
+def test_extract_title():
+    parser = EBookSummaryParser()
+    assert parser.extract_title(GOLDEN_SUMMARY) == "Deep Work by Cal Newport"
+    assert parser.extract_title("Intro\n# Plain Title\n") == "Plain Title"
+    assert parser.extract_title("No heading here") == "eBook Summary"